@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the ElevenLabs text-to-speech API, for load-testing the podcast generators
+Speaks POST /v1/text-to-speech/{voice_id}[/stream][/with-timestamps] and answers with silent MP3 whose length
+follows the text (as JSON with evenly spaced character timings for /with-timestamps, one line per piece
+when streamed)
+
+    python mock_tts_server.py --latency 0.8 --jitter 0.3 --max-concurrent 3 --speed 4
+    ELEVENLABS_BASE_URL=http://127.0.0.1:8765 python generate_full_podcast.py
+    curl http://127.0.0.1:8765/stats
+"""
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import argparse
+import base64
+import json
+import math
+import random
+import re
+import threading
+import time
+
+from podcast_tts import MODEL_CHAR_LIMITS
+
+# Silent MPEG-1 Layer III frame, 128 kbps, 44.1 kHz mono (ElevenLabs' default mp3_44100_128)
+FRAME = bytes([0xFF, 0xFB, 0x90, 0xC4]) + bytes(413)
+FRAME_SECONDS = 1152 / 44100
+SEND_SECONDS = 0.5  # audio per streamed piece
+
+ROUTE = re.compile(r"^/v1/text-to-speech/([^/?]+)(/stream)?(/with-timestamps)?(\?.*)?$")
+
+config = argparse.Namespace()
+rng = random.Random()  # jitter and error draws; seeded from --seed / serve(seed=...)
+stats = {"requests": 0, "ok": 0, "rejected_429": 0, "errors_500": 0, "chars": 0, "audio_seconds": 0.0,
+         "in_flight": 0, "in_flight_peak": 0}
+stats_lock = threading.Lock()
+
+
+def count(**changes):
+    with stats_lock:
+        for key, value in changes.items():
+            stats[key] += value
+        stats["in_flight_peak"] = max(stats["in_flight_peak"], stats["in_flight"])
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, chunked responses
+
+    def log_message(self, fmt, *args):
+        if not config.quiet:
+            super().log_message(fmt, *args)
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/stats":
+            return self.error(404, "not_found", "Unknown route")
+        with stats_lock:
+            body = json.dumps(dict(stats, audio_seconds=round(stats["audio_seconds"], 3))).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        count(requests=1)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        route = ROUTE.match(self.path)
+        if not route:
+            return self.error(404, "not_found", "Unknown route")
+        if not self.headers.get("xi-api-key"):
+            return self.error(401, "needs_authorization", "Missing xi-api-key header")
+        try:
+            payload = json.loads(body)
+            text = payload["text"]
+        except (ValueError, KeyError, TypeError):
+            return self.error(400, "invalid_payload", "Body must be JSON with a text field")
+        limit = MODEL_CHAR_LIMITS.get(payload.get("model_id"))
+        if limit and len(text) > limit:
+            return self.error(400, "text_too_long", f"{len(text)} characters, model allows {limit}")
+
+        with stats_lock:
+            busy = stats["in_flight"] >= config.max_concurrent if config.max_concurrent else False
+            if not busy:
+                stats["in_flight"] += 1
+                stats["in_flight_peak"] = max(stats["in_flight_peak"], stats["in_flight"])
+        if busy:
+            count(rejected_429=1)
+            return self.error(429, "too_many_concurrent_requests",
+                              f"Already {config.max_concurrent} requests in flight")
+        try:
+            if rng.random() < config.rate_429:
+                count(rejected_429=1)
+                return self.error(429, "system_busy", "Simulated rate limit")
+            if rng.random() < config.rate_500:
+                count(errors_500=1)
+                return self.error(500, "internal_error", "Simulated server error")
+            if route.group(3):
+                self.speak_timed(text, stream=bool(route.group(2)))
+            else:
+                self.speak(text)
+        finally:
+            count(in_flight=-1)
+
+    def speak(self, text):
+        seconds = len(text) / config.chars_per_second
+        frames = max(1, math.ceil(seconds / FRAME_SECONDS))
+        time.sleep(max(0.0, rng.gauss(config.latency, config.jitter)))  # time to first byte
+
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        per_piece = max(1, int(SEND_SECONDS / FRAME_SECONDS))
+        for start in range(0, frames, per_piece):
+            n = min(per_piece, frames - start)
+            piece = FRAME * n
+            self.wfile.write(f"{len(piece):X}\r\n".encode() + piece + b"\r\n")
+            if config.speed:
+                time.sleep(n * FRAME_SECONDS / config.speed)  # generation pace
+        self.wfile.write(b"0\r\n\r\n")
+        count(ok=1, chars=len(text), audio_seconds=frames * FRAME_SECONDS)
+
+    def speak_timed(self, text, stream=False):
+        seconds = len(text) / config.chars_per_second
+        frames = max(1, math.ceil(seconds / FRAME_SECONDS))
+        time.sleep(max(0.0, rng.gauss(config.latency, config.jitter)))
+        step = frames * FRAME_SECONDS / max(len(text), 1)
+
+        def piece(first, n):  # frames [first, first + n) and the characters that start inside them
+            chars = range(math.ceil(first * FRAME_SECONDS / step - 1e-9),
+                          min(len(text), math.ceil((first + n) * FRAME_SECONDS / step - 1e-9)))
+            return json.dumps({
+                "audio_base64": base64.b64encode(FRAME * n).decode("ascii"),
+                "alignment": {"characters": [text[k] for k in chars],
+                              "character_start_times_seconds": [round(k * step, 3) for k in chars],
+                              "character_end_times_seconds": [round((k + 1) * step, 3) for k in chars]},
+            }).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if not stream:
+            if config.speed:
+                time.sleep(frames * FRAME_SECONDS / config.speed)  # the whole clip is generated before it is sent
+            body = piece(0, frames)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            per_piece = max(1, int(SEND_SECONDS / FRAME_SECONDS))
+            for start in range(0, frames, per_piece):
+                n = min(per_piece, frames - start)
+                line = piece(start, n) + b"\n"
+                self.wfile.write(f"{len(line):X}\r\n".encode() + line + b"\r\n")
+                if config.speed:
+                    time.sleep(n * FRAME_SECONDS / config.speed)
+            self.wfile.write(b"0\r\n\r\n")
+        count(ok=1, chars=len(text), audio_seconds=frames * FRAME_SECONDS)
+
+    def error(self, status, code, message):
+        body = json.dumps({"detail": {"status": code, "message": message}}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(host="127.0.0.1", port=8765, **options):
+    """Start the mock in a background thread; returns the server (server.shutdown() to stop)."""
+    defaults = vars(parser.parse_args([]))
+    config.__dict__.update(defaults, **options)
+    rng.seed(config.seed)
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+parser = argparse.ArgumentParser(description="Mock ElevenLabs text-to-speech server.")
+parser.add_argument("--host", default="127.0.0.1")
+parser.add_argument("--port", type=int, default=8765)
+parser.add_argument("--latency", type=float, default=0.5, help="mean seconds to first byte")
+parser.add_argument("--jitter", type=float, default=0.1, help="std dev of the latency, seconds")
+parser.add_argument("--speed", type=float, default=4.0, help="audio generated per wall second (0 = instant)")
+parser.add_argument("--chars-per-second", type=float, default=15.0, help="speech rate: text chars per audio second")
+parser.add_argument("--max-concurrent", type=int, default=0, help="answer 429 above this many requests in flight (0 = no limit)")
+parser.add_argument("--rate-429", type=float, default=0.0, help="probability of a random 429")
+parser.add_argument("--rate-500", type=float, default=0.0, help="probability of a random 500")
+parser.add_argument("--seed", type=int, help="seed the jitter and error draws for reproducible runs")
+parser.add_argument("--quiet", action="store_true", help="no per-request log lines")
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    rng.seed(args.seed)
+    config.__dict__.update(vars(args))
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"🧪 Mock TTS listening on http://{args.host}:{args.port} "
+          f"(latency {args.latency}±{args.jitter}s, {args.speed}x realtime, max {args.max_concurrent or '∞'} in flight)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n📊", json.dumps(stats))
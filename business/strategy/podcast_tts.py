@@ -0,0 +1,1612 @@
+#!/usr/bin/env python3
+"""
+Podcast synthesis engine: script -> chapters -> TTS chunks -> one MP3 with chapter markers
+Backends: ElevenLabs REST ("rest"), the elevenlabs SDK ("sdk") or a local mock ("mock")
+
+    python podcast_tts.py podcast-script-argentina-solar.md --model eleven_turbo_v2_5
+    python podcast_tts.py --jobs episodes.json --backend mock
+    python podcast_tts.py . --rpm 100 --cpm 50000     # every podcast script in a directory
+    python podcast_tts.py . --metrics runs.jsonl       # per-request metrics + runs.prom snapshot
+"""
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from difflib import SequenceMatcher
+from pathlib import Path
+import argparse
+import base64
+import glob
+import hashlib
+import heapq
+import json
+import math
+import os
+import random
+import re
+import shutil
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:  # optional: HTTP/2 multiplexing for the REST path (pip install 'httpx[http2]')
+    import httpx
+    import h2  # noqa: F401
+except ImportError:
+    httpx = None
+
+API_URL = "https://api.elevenlabs.io"
+DEFAULT_VOICE_ID = "nGHEi2LLCNB42mOBggON"  # Kaniel Hebrew HQ
+DEFAULT_MODEL = "eleven_multilingual_v2"  # Most reliable for Hebrew
+DEFAULT_VOICE_SETTINGS = {
+    "stability": 0.6,
+    "similarity_boost": 0.85,
+    "style": 0.2,
+    "use_speaker_boost": True
+}
+MAX_IN_FLIGHT = int(os.getenv("ELEVENLABS_MAX_IN_FLIGHT", "3"))  # Match the plan's concurrency quota
+REQUESTS_PER_MIN = float(os.getenv("ELEVENLABS_RPM", "0"))   # 0 = unlimited
+CHARS_PER_MIN = float(os.getenv("ELEVENLABS_CPM", "0"))
+BURST_SECONDS = 10       # token buckets hold this many seconds of quota
+SCRIPT_GLOBS = ("podcast-script*.md", "podcast-*.txt")  # what a directory argument expands to
+MAX_ATTEMPTS = int(os.getenv("ELEVENLABS_MAX_ATTEMPTS", "5"))  # per chapter, first try included
+RETRY_BASE_DELAY = 1.0   # seconds, doubled each attempt
+RETRY_MAX_DELAY = 60.0
+PROGRESS_EVERY = 256 * 1024  # bytes between progress callbacks while streaming
+CONNECT_TIMEOUT = 10.0
+READ_TIMEOUT = 120.0     # max silence between bytes; long chapters take a while to start
+
+
+class TTSError(RuntimeError):
+    """Non-200 answer from the TTS API (status_code matches the SDK's ApiError)."""
+
+    def __init__(self, status_code, message):
+        super().__init__(f"Error {status_code}: {message}")
+        self.status_code = status_code
+
+
+def _retryable(e):
+    status = getattr(e, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    if httpx and isinstance(e, httpx.TransportError):
+        return True
+    return isinstance(e, OSError)  # connection resets, timeouts (requests' errors are OSErrors too)
+
+
+def with_retries(fn, attempts=MAX_ATTEMPTS, on_retry=None):
+    """Call fn(), retrying 429/5xx and network errors with exponential backoff and full jitter.
+
+    on_retry(attempt, error, delay) is called before each sleep. Anything else,
+    or the last failure, is raised.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == attempts or not _retryable(e):
+                raise
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+            if on_retry:
+                on_retry(attempt, e, delay)
+            time.sleep(delay)
+
+
+SCRIPT_SECTION = "סקריפט"                          # "## סקריפט" starts the spoken part of a .md script
+CHAPTER_HEADING = re.compile(r"פרק\s+(\d+)\s*:")   # "### פרק 3: ..." -> chapter3
+CONCLUSION_HEADING = "סיכום"
+
+
+def _chapter_name(title):
+    m = CHAPTER_HEADING.match(title)
+    if m:
+        return f"chapter{m.group(1)}"
+    if title.startswith(CONCLUSION_HEADING):
+        return "conclusion"
+    return re.sub(r"\W+", "_", title).strip("_").lower() or "section"
+
+
+def _chapter(name, title, body):
+    text = "\n\n".join(part for part in (title, "\n".join(body).strip()) if part)
+    return {"name": name, "title": title, "text": text, "chars": len(text), "words": len(text.split())}
+
+
+def parse_chapters(script_path):
+    """Read a podcast script once, yielding a chapter record per "###" heading.
+
+    Only "## סקריפט..." sections are spoken in a Markdown script; other "##"
+    sections (metadata) are skipped. Files without "##" headings are all
+    script; a "#" title line is never read out. Text before the first "###" becomes "intro" ("full" if the file has
+    no headings at all). Records are {name, title, text, chars, words}; the
+    heading stays in the text, as it is read out as the chapter announcement.
+    Names are unique: a repeated one gets a suffix ("pausa", "pausa_2").
+    """
+    used = set()
+
+    def numbered(record):
+        base, n = record["name"], 1
+        while record["name"] in used:
+            n += 1
+            record["name"] = f"{base}_{n}"
+        used.add(record["name"])
+        return record
+
+    in_script = True
+    name, title, body = "intro", "", []
+    seen_heading = False
+    with open(script_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith("### "):
+                if in_script:
+                    if body or title:
+                        record = _chapter(name, title, body)
+                        if record["text"]:
+                            yield numbered(record)
+                    title = line.lstrip("#").strip()
+                    name, body, seen_heading = _chapter_name(title), [], True
+            elif line.startswith("## "):
+                in_script = line[3:].strip().startswith(SCRIPT_SECTION)
+            elif line.startswith("# "):
+                continue  # the document title: not read out, and no section change
+            elif in_script and line.strip() != "---":
+                body.append(line)
+    record = _chapter(name if seen_heading else "full", title, body)
+    if record["text"]:
+        yield numbered(record)
+
+
+# Max characters per request. Override with TTS_CHUNK_CHARS, e.g. to trade requests for concurrency
+MODEL_CHAR_LIMITS = {
+    "eleven_multilingual_v2": 10000,
+    "eleven_turbo_v2_5": 40000,
+    "eleven_flash_v2_5": 40000,
+}
+DEFAULT_CHAR_LIMIT = 5000
+
+# Sentence ends: . ! ? … and Hebrew sof pasuq, with closing quotes/brackets, then whitespace; or a blank line
+SENTENCE_END = re.compile(r"(\w*)[.!?…׃]+[\"'”’»)\]]*\s+|\n\s*\n")
+ABBREVIATIONS = {"sr", "sra", "srta", "dr", "dra", "ing", "lic", "arq", "av", "pág", "núm", "nro", "uu", "ee"}
+
+
+def chunk_budget(model_id):
+    """Characters per TTS request for model_id."""
+    return int(os.getenv("TTS_CHUNK_CHARS") or MODEL_CHAR_LIMITS.get(model_id, DEFAULT_CHAR_LIMIT))
+
+
+def split_sentences(text):
+    """Split Hebrew/Spanish text into sentences, each keeping its trailing whitespace."""
+    sentences, start = [], 0
+    for m in SENTENCE_END.finditer(text):
+        if m.group(1) and m.group(1).lower() in ABBREVIATIONS:
+            continue  # "Sr. Pérez", "EE.UU. y" are not sentence ends
+        sentences.append(text[start:m.end()])
+        start = m.end()
+    if start < len(text):
+        sentences.append(text[start:])
+    return sentences
+
+
+def _pieces(text, limit):
+    """Sentences of text, with any sentence longer than limit split at whitespace (never truncated)."""
+    for sentence in split_sentences(text):
+        while len(sentence) > limit:
+            cut = sentence.rfind(" ", 0, limit)
+            cut = cut + 1 if cut > 0 else limit
+            yield sentence[:cut]
+            sentence = sentence[cut:]
+        if sentence:
+            yield sentence
+
+
+def _packed(segments):
+    parts, marks, offset = [], [], 0
+    for seg in segments:
+        text = "".join(seg["sentences"]).strip()
+        chapter = seg["chapter"]
+        marks.append({"name": chapter["name"], "title": chapter["title"], "start": offset, "end": offset + len(text),
+                      "continued": seg["continued"], "continues": seg["continues"]})
+        parts.append(text)
+        offset += len(text) + 2
+    first, last = marks[0], marks[-1]
+    part = segments[0]["part"]  # chapter3, chapter3_cont, chapter3_cont2...: unique, as chapter names are
+    name = first["name"] + ("_cont" if part == 2 else f"_cont{part - 1}" if part > 2 else "")
+    if last is not first:
+        name += f"-{last['name']}"
+    text = "\n\n".join(parts)
+    return {"name": name, "text": text, "chars": len(text), "words": len(text.split()), "chapters": marks}
+
+
+def pack_chunks(chapters, budget):
+    """Greedily pack the chapters' sentences into as few requests of at most budget chars as possible.
+
+    Chapters are joined with a blank line; a chapter is only split (at a
+    sentence end) when it does not fit. Yields chunk records {name, text,
+    chars, words, chapters}, where chapters lists each chapter's span in the
+    chunk text: {name, title, start, end, continued, continues}.
+    """
+    segments, size = [], 0
+    for chapter in chapters:
+        continued, part = False, 0
+        for sentence in _pieces(chapter["text"], budget - 2):
+            if segments and size + len(sentence) + 2 > budget:
+                segments[-1]["continues"] = segments[-1]["chapter"] is chapter
+                yield _packed(segments)
+                segments, size = [], 0
+            if not segments or segments[-1]["chapter"] is not chapter:
+                part += 1
+                segments.append({"chapter": chapter, "sentences": [], "continued": continued, "continues": False,
+                                 "part": part})
+            segments[-1]["sentences"].append(sentence)
+            size += len(sentence) + 2
+            continued = True
+    if segments:
+        yield _packed(segments)
+
+
+class TokenBucket:
+    """rate tokens/second, holding at most capacity."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.stamp = time.monotonic()
+
+    def wait(self, cost, now):
+        """Seconds until cost can be taken (costs above capacity only need a full bucket)."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        need = min(cost, self.capacity)
+        return 0.0 if self.tokens >= need else (need - self.tokens) / self.rate
+
+    def take(self, cost):
+        self.tokens -= cost  # may go negative for an oversized cost: later callers wait it off
+
+
+class RateLimiter:
+    """Requests-per-minute and characters-per-minute quotas shared by every worker of a run."""
+
+    def __init__(self, requests_per_min=0, chars_per_min=0, burst_seconds=BURST_SECONDS):
+        self.requests_per_min = requests_per_min
+        self.chars_per_min = chars_per_min
+        self.buckets = []
+        if requests_per_min:
+            self.buckets.append((TokenBucket(requests_per_min / 60, max(1.0, requests_per_min / 60 * burst_seconds)), False))
+        if chars_per_min:
+            self.buckets.append((TokenBucket(chars_per_min / 60, chars_per_min / 60 * burst_seconds), True))
+        self._lock = threading.Lock()
+
+    def acquire(self, chars):
+        """Block until one request of chars characters fits both quotas; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max([bucket.wait(chars if by_chars else 1, now) for bucket, by_chars in self.buckets] or [0])
+                if wait <= 0:
+                    for bucket, by_chars in self.buckets:
+                        bucket.take(chars if by_chars else 1)
+                    return waited
+            time.sleep(wait)
+            waited += wait
+
+
+def fair_order(queues):
+    """Interleave several task lists so each gets an equal share of characters.
+
+    queues is a list of [(chars, task), ...]; the next task always comes from
+    the list that has been given the fewest characters so far, so one long
+    episode cannot starve the others.
+    """
+    heap = [(0, n, 0) for n, queue in enumerate(queues) if queue]
+    heapq.heapify(heap)
+    while heap:
+        given, n, pos = heapq.heappop(heap)
+        chars, task = queues[n][pos]
+        yield task
+        if pos + 1 < len(queues[n]):
+            heapq.heappush(heap, (given + chars, n, pos + 1))
+
+
+def expand_scripts(patterns):
+    """Script paths from files, directories (SCRIPT_GLOBS inside them) and glob patterns."""
+    paths = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            found = sorted({p for g in SCRIPT_GLOBS for p in path.glob(g)})
+        elif glob.has_magic(pattern):
+            found = sorted(Path(p) for p in glob.glob(pattern, recursive=True))
+        else:
+            found = [path]
+        if not found:
+            raise SystemExit(f"❌ No podcast scripts match {pattern}")
+        paths += [p for p in found if p not in paths]
+    return paths
+
+
+def synthesize_all(chapters, synthesize, max_in_flight, on_done=None, on_error=None):
+    """Run synthesize(i, chapter) for every chapter with at most max_in_flight requests at once.
+
+    i is the 1-based chapter number, so file names stay the same as in a
+    sequential run. on_done(i, chapter, result) is called as each chapter
+    finishes. Returns the results in chapter order. With on_error, a failed
+    chapter calls on_error(i, chapter, error), gets None as its result and the
+    rest keep going. Without it, the first exception stops chapters that have
+    not started yet and is re-raised once in-flight requests return.
+    """
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_in_flight)) as pool:
+        futures = {pool.submit(synthesize, i, chapter): i for i, chapter in enumerate(chapters, 1)}
+        try:
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    if on_error is None:
+                        raise
+                    results[i] = None
+                    on_error(i, chapters[i - 1], e)
+                    continue
+                if on_done:
+                    on_done(i, chapters[i - 1], results[i])
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    return [results[i] for i in sorted(results)]
+
+
+def stream_to_file(chunks, dest, started, on_progress=None):
+    """Write an iterator of audio byte chunks to dest as they arrive.
+
+    Data goes to dest.part and is renamed over dest only once the stream is
+    complete, so a dropped connection never leaves a truncated chunk behind.
+    started is the perf_counter() taken just before the request was sent.
+    on_progress(bytes_received) is called every PROGRESS_EVERY bytes.
+    Returns {bytes, ttfb, seconds, kbps}.
+    """
+    dest = Path(dest)
+    part = dest.with_name(dest.name + ".part")
+    received, ttfb, next_report = 0, None, PROGRESS_EVERY
+    try:
+        with open(part, "wb") as f:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                if ttfb is None:
+                    ttfb = time.perf_counter() - started
+                f.write(chunk)
+                received += len(chunk)
+                if on_progress and received >= next_report:
+                    on_progress(received)
+                    next_report += PROGRESS_EVERY
+        os.replace(part, dest)
+    finally:
+        if part.exists():
+            part.unlink()
+    seconds = time.perf_counter() - started
+    return {
+        "bytes": received,
+        "ttfb": round(ttfb or seconds, 3),
+        "seconds": round(seconds, 3),
+        "kbps": round(received / 1024 / max(seconds - (ttfb or 0), 1e-6), 1),
+    }
+
+
+ALIGNMENT_KEYS = ("characters", "character_start_times_seconds", "character_end_times_seconds")
+
+
+def timed_audio(lines, alignment):
+    """Audio bytes of a stream/with-timestamps response, piece by piece as its lines arrive.
+
+    Each line is a JSON object with "audio_base64" and, for the characters
+    that piece speaks, an "alignment" whose times count from the start of the
+    whole clip; those are appended to the alignment dict as they come.
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        piece = json.loads(line)
+        for key in ALIGNMENT_KEYS:
+            alignment.setdefault(key, []).extend((piece.get("alignment") or {}).get(key) or [])
+        if piece.get("audio_base64"):
+            yield base64.b64decode(piece["audio_base64"])
+
+
+class RestBackend:
+    """ElevenLabs REST API over pooled keep-alive connections, shared by every request of a run.
+
+    Uses HTTP/2 through httpx when it is installed (one multiplexed TLS
+    connection), otherwise a requests.Session whose pool holds
+    max_connections connections and blocks callers beyond that.
+    """
+
+    name = "rest"
+
+    def __init__(self, api_key, base_url=API_URL, max_connections=MAX_IN_FLIGHT):
+        self.base_url = base_url.rstrip("/")
+        # Audio from anything but the real API (a mock, a proxy under test) must not share cache entries
+        self.cache_tag = "" if self.base_url == API_URL else self.base_url
+        headers = {"xi-api-key": api_key, "Content-Type": "application/json"}
+        if httpx:
+            self.http2 = True
+            self._client = httpx.Client(
+                http2=True, headers=headers,
+                timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections))
+        else:
+            self.http2 = False
+            self._client = requests.Session()
+            self._client.headers.update(headers)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections, pool_block=True, max_retries=0)
+            self._client.mount("https://", adapter)
+            self._client.mount("http://", adapter)
+
+    def describe(self):
+        return f"{self.base_url}, {'HTTP/2' if self.http2 else 'HTTP/1.1 keep-alive'}"
+
+    def synthesize(self, text, job, dest, on_progress=None, context=None):
+        """Synthesize text with job's voice/model/settings into dest; returns stream_to_file's stats
+        plus the character "alignment" (see sentence_times).
+
+        context is (previous_text, next_text): text around this one that is not
+        spoken but conditions its prosody, so a patched passage blends in.
+        """
+        payload = {"text": text, "model_id": job.model_id, "voice_settings": job.voice_settings}
+        for name, value in zip(("previous_text", "next_text"), context or ()):
+            if value:
+                payload[name] = value
+        return self.post_audio(f"/v1/text-to-speech/{job.voice_id}/stream/with-timestamps", payload, dest, on_progress)
+
+    def post_audio(self, path, payload, dest, on_progress=None):
+        """POST payload as JSON to a stream/with-timestamps endpoint and stream its audio into dest.
+
+        The response is one JSON object per line, each with a base64 piece of
+        the MP3 and the timings of the characters it speaks (see timed_audio).
+        Returns stream_to_file's stats plus "alignment".
+        """
+        url = self.base_url + path
+        alignment = {}
+        started = time.perf_counter()
+        if self.http2:
+            with self._client.stream("POST", url, json=payload) as response:
+                if response.status_code != 200:
+                    raise TTSError(response.status_code, response.read().decode("utf-8", "replace"))
+                stats = stream_to_file(timed_audio(response.iter_lines(), alignment), dest, started, on_progress)
+        else:
+            with self._client.post(url, json=payload, stream=True,
+                                   timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) as response:
+                if response.status_code != 200:
+                    raise TTSError(response.status_code, response.text)
+                stats = stream_to_file(timed_audio(response.iter_lines(), alignment), dest, started, on_progress)
+        stats["alignment"] = alignment
+        return stats
+
+    def close(self):
+        self._client.close()
+
+
+class SdkBackend:
+    """The official elevenlabs SDK (pip install elevenlabs); stream_with_timestamps() streams the MP3 with timings."""
+
+    name = "sdk"
+
+    def __init__(self, api_key, base_url=API_URL, max_connections=MAX_IN_FLIGHT):
+        from elevenlabs.client import ElevenLabs
+        from elevenlabs import VoiceSettings
+        self._client = ElevenLabs(api_key=api_key, base_url=base_url)
+        self._settings = VoiceSettings
+        self.base_url = base_url.rstrip("/")
+        self.cache_tag = "" if self.base_url == API_URL else self.base_url
+
+    def describe(self):
+        return f"{self.base_url}, elevenlabs SDK"
+
+    def synthesize(self, text, job, dest, on_progress=None, context=None):
+        started = time.perf_counter()
+        previous_text, next_text = context or (None, None)
+        pieces = self._client.text_to_speech.stream_with_timestamps(
+            text=text,
+            voice_id=job.voice_id,
+            model_id=job.model_id,
+            voice_settings=self._settings(**job.voice_settings),
+            previous_text=previous_text or None,
+            next_text=next_text or None,
+        )
+        alignment = {}
+
+        def audio():
+            for piece in pieces:
+                if piece.alignment:
+                    for key in ALIGNMENT_KEYS:
+                        alignment.setdefault(key, []).extend(getattr(piece.alignment, key) or [])
+                if piece.audio_base_64:
+                    yield base64.b64decode(piece.audio_base_64)
+        stats = stream_to_file(audio(), dest, started, on_progress)
+        stats["alignment"] = alignment
+        return stats
+
+    def close(self):
+        pass
+
+
+class MockBackend(RestBackend):
+    """RestBackend against an in-process mock_tts_server.py: exercises the whole pipeline without credits."""
+
+    name = "mock"
+
+    def __init__(self, api_key="mock", base_url=None, max_connections=MAX_IN_FLIGHT, **mock_options):
+        import mock_tts_server
+        # fast and reproducible by default
+        mock_options = dict({"latency": 0.2, "jitter": 0.05, "speed": 0, "seed": 0}, **mock_options)
+        self.server = mock_tts_server.serve(port=0, quiet=True, **mock_options)
+        super().__init__(api_key, f"http://127.0.0.1:{self.server.server_port}", max_connections)
+        self.cache_tag = "mock"
+
+    def close(self):
+        super().close()
+        self.server.shutdown()
+
+
+BACKENDS = {"rest": RestBackend, "sdk": SdkBackend, "mock": MockBackend}
+
+
+def _write_json(path, data):
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+MPEG1_L3_KBPS = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+MPEG2_L3_KBPS = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}  # by version bits
+READ_BLOCK = 64 * 1024
+
+FrameHeader = namedtuple("FrameHeader", "version bitrate_index sample_rate channel_mode length samples")
+
+
+def frame_header(b, pos=0):
+    """Parse the MPEG-1/2/2.5 Layer III frame header at b[pos:pos+4], or None if there is none."""
+    if b[pos] != 0xFF or b[pos + 1] & 0xE0 != 0xE0:
+        return None
+    version = (b[pos + 1] >> 3) & 3   # 3 = MPEG1, 2 = MPEG2, 0 = MPEG2.5
+    layer = (b[pos + 1] >> 1) & 3     # 1 = Layer III
+    bitrate_index = b[pos + 2] >> 4
+    rate_index = (b[pos + 2] >> 2) & 3
+    if version == 1 or layer != 1 or not 0 < bitrate_index < 15 or rate_index == 3:
+        return None
+    sample_rate = SAMPLE_RATES[version][rate_index]
+    padding = (b[pos + 2] >> 1) & 1
+    if version == 3:
+        kbps, samples = MPEG1_L3_KBPS[bitrate_index], 1152
+    else:
+        kbps, samples = MPEG2_L3_KBPS[bitrate_index], 576
+    length = samples // 8 * kbps * 1000 // sample_rate + padding
+    return FrameHeader(version, bitrate_index, sample_rate, b[pos + 3] >> 6, length, samples)
+
+
+def _side_info_len(h):
+    mono = h.channel_mode == 3
+    if h.version == 3:
+        return 17 if mono else 32
+    return 9 if mono else 17
+
+
+def _is_info_frame(h, frame):
+    """Xing/Info (LAME) or VBRI header frame: metadata, not audio."""
+    at = 4 + _side_info_len(h)
+    return frame[at:at + 4] in (b"Xing", b"Info") or frame[36:40] == b"VBRI"
+
+
+def iter_frames(path):
+    """Yield (FrameHeader, frame bytes) for every audio frame of an MP3 file, reading it block by block.
+
+    ID3v2 tags, a trailing ID3v1 tag, Xing/Info/VBRI header frames and junk
+    between frames are skipped; a truncated last frame is dropped.
+    """
+    with open(path, "rb") as f:
+        head = f.read(10)
+        if head[:3] == b"ID3":
+            size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+            f.seek(10 + size + (10 if head[5] & 0x10 else 0))
+        else:
+            f.seek(0)
+        data, pos, first, h = b"", 0, True, None
+        while True:
+            if len(data) - pos < 4 or (h and len(data) - pos < h.length):
+                more = f.read(READ_BLOCK)
+                if not more:
+                    return
+                data, pos = data[pos:] + more, 0
+            h = frame_header(data, pos)
+            if h is None:
+                if data[pos:pos + 3] == b"TAG":  # ID3v1 at the very end
+                    return
+                nxt = data.find(b"\xff", pos + 1)
+                pos = nxt if nxt != -1 else len(data)
+                continue
+            if len(data) - pos < h.length:
+                continue  # read more
+            frame = data[pos:pos + h.length]
+            pos += h.length
+            if first:
+                first = False
+                if _is_info_frame(h, frame):
+                    continue
+            yield h, frame
+            h = None
+
+
+def mp3_duration(path):
+    """Duration in seconds of an MP3 file, from its frame headers."""
+    return sum(h.samples / h.sample_rate for h, _ in iter_frames(path)) or None
+
+
+def _id3_frame(frame_id, payload):
+    return frame_id.encode("ascii") + len(payload).to_bytes(4, "big") + b"\0\0" + payload
+
+
+def _id3_text(frame_id, text):
+    return _id3_frame(frame_id, b"\x01" + text.encode("utf-16") + b"\0\0")  # UTF-16 with BOM
+
+
+def id3_chapter_tag(chapters, seconds, size=None):
+    """ID3v2.3 tag with TLEN, one CHAP per chapter ({title, start, end} in seconds) and a CTOC listing them.
+
+    size pads the tag to exactly that many bytes (so it can fill space reserved earlier).
+    """
+    frames = [_id3_text("TLEN", str(round(seconds * 1000)))]
+    ids = []
+    for i, chapter in enumerate(chapters):
+        element_id = f"chp{i}".encode("ascii")
+        ids.append(element_id)
+        frames.append(_id3_frame("CHAP", element_id + b"\0"
+                                 + round(chapter["start"] * 1000).to_bytes(4, "big")
+                                 + round(chapter["end"] * 1000).to_bytes(4, "big")
+                                 + b"\xff" * 8  # no byte offsets
+                                 + _id3_text("TIT2", chapter["title"])))
+    if ids:
+        frames.append(_id3_frame("CTOC", b"toc\0" + bytes([0x03, len(ids)]) + b"".join(i + b"\0" for i in ids)))
+    body = b"".join(frames)
+    if size is not None:
+        if len(body) + 10 > size:
+            raise ValueError(f"ID3 tag needs {len(body) + 10} bytes, only {size} reserved")
+        body += bytes(size - 10 - len(body))
+    n = len(body)
+    syncsafe = bytes([(n >> 21) & 0x7F, (n >> 14) & 0x7F, (n >> 7) & 0x7F, n & 0x7F])
+    return b"ID3\x03\x00\x00" + syncsafe + body
+
+
+def write_chapters_json(path, chapters):
+    """Podcasting 2.0 JSON chapters file (the <podcast:chapters> format)."""
+    _write_json(Path(path), {
+        "version": "1.2.0",
+        "chapters": [{"startTime": round(c["start"], 3), "endTime": round(c["end"], 3), "title": c["title"]}
+                     for c in chapters],
+    })
+
+
+class Mp3Writer:
+    """Concatenate MP3 chunks frame by frame into one file with a correct Xing/Info header.
+
+    Chunks are appended as they become available; per-chunk tags and header
+    frames are dropped and a single Info (CBR) or Xing (VBR) frame carrying
+    the frame count, byte count and seek table is written in front on close().
+    Duration, frame count and bitrate are tallied from the frame headers as
+    they are written.
+
+    With chapters (parse_chapters records), space for an ID3 tag is reserved
+    up front and filled on close() with CHAP/CTOC markers, timed from the
+    chapter spans of the chunks passed to append() (a chapter starting part
+    way into a chunk is placed by its character offset).
+
+    The file is built as <path>.part and renamed into place by close(); used
+    as a context manager, the partial file is removed if an error escapes.
+    """
+
+    def __init__(self, path, chapters=None):
+        self.path = Path(path)
+        self.part = self.path.with_name(self.path.name + ".part")
+        self._f = open(self.part, "wb")
+        self._titles = {c["name"]: c["title"] or c["name"] for c in chapters or []}
+        self._tag_size = 0
+        if chapters:
+            placeholder = [{"title": c["title"] or c["name"], "start": 0, "end": 0} for c in chapters]
+            self._tag_size = len(id3_chapter_tag(placeholder, 0)) + 64  # slack for TLEN digits
+            self._f.write(bytes(self._tag_size))
+        self._header = None     # FrameHeader of the reserved Xing frame
+        self._first = None      # first audio frame header bytes, template for the Xing frame
+        self._offsets = []      # byte offset of every audio frame, for the seek table
+        self._bitrates = set()
+        self._audio_bytes = 0
+        self.markers = []       # [{name, title, start}] in seconds
+        self.frames = 0
+        self.seconds = 0.0
+
+    def append(self, chunk_path, chunk=None):
+        """Stream the audio frames of chunk_path into the output; returns the seconds of audio appended.
+
+        chunk is the pack_chunks record the file was synthesized from; its
+        chapter spans become chapter markers.
+        """
+        before = self.seconds
+        for h, frame in iter_frames(chunk_path):
+            if self._header is None:
+                self._reserve(h, frame[:4])
+            elif (h.sample_rate, h.channel_mode) != (self._header.sample_rate, self._header.channel_mode):
+                raise ValueError(f"{chunk_path}: {h.sample_rate} Hz/mode {h.channel_mode} does not match "
+                                 f"{self._header.sample_rate} Hz/mode {self._header.channel_mode}")
+            self._offsets.append(self._f.tell())
+            self._bitrates.add(h.bitrate_index)
+            self._f.write(frame)
+            self._audio_bytes += len(frame)
+            self.frames += 1
+            self.seconds += h.samples / h.sample_rate
+        duration = self.seconds - before
+        if chunk:
+            for span in chunk["chapters"]:
+                if not span["continued"]:
+                    self.markers.append({"name": span["name"], "title": self._titles.get(span["name"]) or span["name"],
+                                         "start": before + duration * span["start"] / max(chunk["chars"], 1)})
+        return duration
+
+    def chapters(self):
+        """Chapter markers so far as [{name, title, start, end, duration}] in seconds."""
+        out = []
+        for i, marker in enumerate(self.markers):
+            end = self.markers[i + 1]["start"] if i + 1 < len(self.markers) else self.seconds
+            out.append(dict(marker, end=end, duration=end - marker["start"]))
+        return out
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type:
+            self.discard()
+
+    def discard(self):
+        """Drop the partial output (no-op after close())."""
+        if not self._f.closed:
+            self._f.close()
+            self.part.unlink()
+
+    def _reserve(self, h, raw):
+        # Smallest bitrate, from the first frame's up, whose frame holds the Xing data
+        need = 4 + _side_info_len(h) + 4 + 4 + 4 + 4 + 100
+        for index in range(h.bitrate_index, 15):
+            b = bytes([raw[0], raw[1] | 0x01, (index << 4) | (raw[2] & 0x0C), raw[3]])  # no CRC, no padding
+            header = frame_header(b)
+            if header.length >= need:
+                break
+        self._first = b
+        self._header = header
+        self._f.write(bytes(header.length))
+
+    def close(self):
+        """Write the Xing/Info frame and ID3 tag, move the file into place and return
+        {frames, bytes, seconds, kbps, chapters}."""
+        if self._header is None:
+            self._f.close()
+            self.part.unlink()
+            raise ValueError("no MPEG audio frames were appended")
+        h = self._header
+        start = self._tag_size                # the Xing frame; its offsets are relative to it
+        total = self._f.tell() - start
+        toc = bytearray(100)
+        for i in range(100):
+            offset = self._offsets[min(self.frames - 1, i * self.frames // 100)] - start
+            toc[i] = min(255, offset * 256 // total)
+        tag = b"Info" if len(self._bitrates) == 1 else b"Xing"
+        frame = bytearray(h.length)
+        frame[:4] = self._first
+        at = 4 + _side_info_len(h)
+        frame[at:at + 16] = tag + (7).to_bytes(4, "big") + self.frames.to_bytes(4, "big") + total.to_bytes(4, "big")
+        frame[at + 16:at + 116] = toc
+        chapters = self.chapters()
+        try:
+            tag = id3_chapter_tag(chapters, self.seconds, self._tag_size) if self._tag_size else b""
+        except ValueError:
+            self.discard()
+            raise
+        self._f.seek(0)
+        self._f.write(tag)
+        self._f.write(frame)
+        self._f.close()
+        os.replace(self.part, self.path)
+        return {
+            "frames": self.frames,
+            "bytes": self._tag_size + total,
+            "seconds": round(self.seconds, 3),
+            "kbps": round(self._audio_bytes * 8 / 1000 / self.seconds, 1) if self.seconds else 0,
+            "chapters": chapters,
+        }
+
+
+class OrderedAssembler:
+    """Append finished chunks to an Mp3Writer in order, as soon as every earlier chunk is in.
+
+    add() takes chunks in completion order (e.g. from synthesize_all's
+    on_done), so the episode grows while later chunks are still being
+    synthesized and is complete right after the last one lands.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.next = 1           # 1-based, like synthesize_all's i
+        self.pending = {}
+
+    def add(self, i, path, chunk=None):
+        """Chunk i is ready; returns how many chunks were appended by this call."""
+        self.pending[i] = (path, chunk)
+        appended = 0
+        while self.next in self.pending:
+            self.writer.append(*self.pending.pop(self.next))
+            self.next += 1
+            appended += 1
+        return appended
+
+
+PATCH_MAX_SHARE = 0.5        # above this share of a chunk's text changed, synthesize the whole chunk again
+PATCH_MERGE_SENTENCES = 2    # changes fewer unchanged sentences apart are re-synthesized as one passage
+PATCH_CONTEXT_CHARS = 300    # previous_text / next_text sent with a patched passage, for prosody
+
+
+def sentence_times(text, alignment):
+    """[[start, end]] seconds of each split_sentences(text) sentence, from a with-timestamps alignment.
+
+    alignment is the API's {characters, character_start_times_seconds,
+    character_end_times_seconds} for exactly this text, joined across the
+    pieces of a streamed response (see timed_audio). Returns None when it
+    is missing or does not line up with the text character for character;
+    such a chunk is synthesized whole if it is ever edited.
+    """
+    chars = (alignment or {}).get("characters") or []
+    starts = (alignment or {}).get("character_start_times_seconds") or []
+    ends = (alignment or {}).get("character_end_times_seconds") or []
+    if not len(chars) == len(starts) == len(ends) == len(text) or "".join(chars) != text:
+        return None
+    if any(b < a for a, b in zip(starts, starts[1:])):  # pieces timed from their own start, not the clip's
+        return None
+    times, at, last = [], 0, 0.0
+    for sentence in split_sentences(text):
+        spoken = [k for k in range(at, at + len(sentence)) if not text[k].isspace()]
+        if spoken:
+            last = ends[spoken[-1]]
+            times.append([round(starts[spoken[0]], 3), round(last, 3)])
+        else:
+            times.append([round(last, 3), round(last, 3)])
+        at += len(sentence)
+    return times
+
+
+def _main_data_begin(h, frame):
+    """The frame's bit reservoir pointer: how many main data bytes of earlier frames it uses."""
+    if not frame[1] & 1:
+        raise ValueError("CRC-protected MP3 frames cannot be spliced")
+    if h.version == 3:
+        return (frame[4] << 1) | (frame[5] >> 7)   # MPEG1: 9 bits
+    return frame[4]                                # MPEG2/2.5: 8 bits
+
+
+def _frame_layout(path):
+    """(frame count, seconds per frame) of an MP3 file."""
+    n, h = 0, None
+    for h, _ in iter_frames(path):
+        n += 1
+    if not h:
+        raise ValueError(f"{path}: no MPEG audio frames")
+    return n, h.samples / h.sample_rate
+
+
+def plan_patch(old_text, old_times, new_text, old_path):
+    """What to re-synthesize to turn the audio of old_text (old_path) into that of new_text.
+
+    old_times are the sentence timings of old_path (sentence_times). Both
+    texts are diffed sentence by sentence, and each changed passage becomes a
+    window: old frames [start, end) are replaced by the window's text voiced
+    with context = (previous_text, next_text). Cuts are made in the middle
+    of the pause between two sentences, where the timings place it; lead and
+    tail are the seconds of silence the new audio keeps around its speech so
+    that pause keeps its length. Returns {windows, chars, old_times,
+    frame_seconds}, or None when the whole chunk should be synthesized
+    again (no timings, or too much changed).
+    """
+    old, new = split_sentences(old_text), split_sentences(new_text)
+    if not old_times or len(old_times) != len(old):
+        return None
+    matcher = SequenceMatcher(None, [s.strip() for s in old], [s.strip() for s in new], autojunk=False)
+    changes = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        if changes and i1 - changes[-1][1] < PATCH_MERGE_SENTENCES:
+            i1, _, j1, _ = changes.pop()
+        changes.append((i1, i2, j1, j2))
+    chars = sum(len("".join(new[j1:j2]).strip()) for _, _, j1, j2 in changes)
+    if chars > PATCH_MAX_SHARE * len(new_text):
+        return None
+
+    frames, frame_seconds = _frame_layout(old_path)
+
+    def cut(i):  # (frame, seconds) where old sentence i starts: mid-pause between sentences i-1 and i
+        if i == 0:
+            return 0, 0.0
+        if i == len(old):
+            return frames, frames * frame_seconds
+        frame = round((old_times[i - 1][1] + old_times[i][0]) / 2 / frame_seconds)
+        return frame, frame * frame_seconds
+
+    windows, end = [], 0
+    for i1, i2, j1, j2 in changes:
+        (start, start_at), (stop, stop_at) = cut(i1), cut(i2)
+        if start < end or stop < start:
+            return None
+        windows.append({
+            "i1": i1, "i2": i2, "j1": j1, "j2": j2, "start": start, "end": stop,
+            "text": "".join(new[j1:j2]).strip(),
+            "context": ("".join(new[:j1])[-PATCH_CONTEXT_CHARS:].strip(),
+                        "".join(new[j2:])[:PATCH_CONTEXT_CHARS].strip()),
+            # None: keep the new audio's own silence at the start or end of the chunk
+            "lead": None if i1 == 0 else max(0.0, old_times[i1][0] - start_at) if i1 < len(old) else 0.0,
+            "tail": None if i2 == len(old) else max(0.0, stop_at - old_times[i2 - 1][1]) if i2 > 0 else 0.0,
+        })
+        end = stop
+    return {"windows": windows, "chars": chars, "old_times": old_times, "frame_seconds": frame_seconds}
+
+
+def splice_frames(segments, dest):
+    """Write frames [start, end) of each (path, start, end) segment back to back into dest, as one MP3 stream.
+
+    A frame whose bit reservoir (main_data_begin) reaches back across a seam
+    would decode bytes of the other stream; its side info is zeroed instead,
+    which makes it a silent frame. Seams are cut in pauses, so that is
+    inaudible. Returns the number of frames written.
+    """
+    dest = Path(dest)
+    part = dest.with_name(dest.name + ".part")
+    first, frames = None, 0
+    try:
+        with open(part, "wb") as out:
+            for path, start, end in segments:
+                reservoir = 0   # main data bytes of this stream written since the seam
+                for n, (h, frame) in enumerate(iter_frames(path)):
+                    if n < start:
+                        continue
+                    if n >= end:
+                        break
+                    if first is None:
+                        first = h
+                    elif (h.sample_rate, h.channel_mode) != (first.sample_rate, first.channel_mode):
+                        raise ValueError(f"{path}: {h.sample_rate} Hz/mode {h.channel_mode} does not match "
+                                         f"{first.sample_rate} Hz/mode {first.channel_mode}")
+                    side = _side_info_len(h)
+                    if _main_data_begin(h, frame) > reservoir:
+                        frame = frame[:4] + bytes(side) + frame[4 + side:]
+                    out.write(frame)
+                    reservoir += len(frame) - 4 - side
+                    frames += 1
+        os.replace(part, dest)
+    finally:
+        if part.exists():
+            part.unlink()
+    return frames
+
+
+def apply_patch(old_path, plan, dest):
+    """Splice the voiced windows of plan into old_path's frames, writing dest.
+
+    Each window with text must carry "audio" (its synthesized file) and
+    "times" (its sentence_times). The new audio is trimmed to its speech plus
+    the window's lead and tail. Returns the sentence timings of dest, for
+    the next patch.
+    """
+    frame_seconds, old_times = plan["frame_seconds"], plan["old_times"]
+    segments, times, at, written, i = [], [], 0, 0, 0
+
+    def place(spans, shift):
+        times.extend([round(s + shift, 3), round(e + shift, 3)] for s, e in spans)
+
+    for window in plan["windows"]:
+        place(old_times[i:window["i1"]], (written - at) * frame_seconds)
+        segments.append((old_path, at, window["start"]))
+        written += window["start"] - at
+        if window["text"]:
+            spans = window["times"]
+            if spans is None or len(spans) != window["j2"] - window["j1"]:
+                raise ValueError("no sentence timings for the re-synthesized passage")
+            frames, _ = _frame_layout(window["audio"])
+            first = 0 if window["lead"] is None else max(0, int((spans[0][0] - window["lead"]) / frame_seconds))
+            last = frames if window["tail"] is None else min(frames, math.ceil((spans[-1][1] + window["tail"]) / frame_seconds))
+            place(spans, (written - first) * frame_seconds)
+            segments.append((window["audio"], first, last))
+            written += last - first
+        at, i = window["end"], window["i2"]
+    place(old_times[i:], (written - at) * frame_seconds)
+    segments.append((old_path, at, _frame_layout(old_path)[0]))
+    splice_frames(segments, dest)
+    return times
+
+
+def chunk_key(text, voice_id, model_id, voice_settings, backend_tag=""):
+    """Cache key for one synthesized chunk: everything that changes the audio."""
+    parts = [text, voice_id, model_id, voice_settings] + ([backend_tag] if backend_tag else [])
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ChunkCache:
+    """Content-addressed store of synthesized chunks (<key>.mp3 + manifest.json).
+
+    Lives next to audio_chunks/ so unchanged chapters are copied back instead of
+    being sent to the TTS API again. Safe to use from synthesize_all's threads.
+    """
+
+    def __init__(self, cache_dir):
+        self.dir = Path(cache_dir)
+        self.dir.mkdir(exist_ok=True)
+        self.manifest_path = self.dir / "manifest.json"
+        self.manifest = {}
+        if self.manifest_path.exists():
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        self._lock = threading.Lock()
+
+    def fetch(self, key, dest):
+        """Copy the cached chunk for key to dest. Returns its manifest entry, or None on a miss."""
+        cached = self.dir / f"{key}.mp3"
+        if key not in self.manifest or not cached.exists():
+            return None
+        shutil.copyfile(cached, dest)
+        return self.manifest[key]
+
+    def store(self, key, src, **meta):
+        """Add a freshly synthesized file under key, with meta (chapter name, chars...) in the manifest."""
+        tmp = self.dir / f"{key}.mp3.tmp"
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, self.dir / f"{key}.mp3")
+        with self._lock:
+            self.manifest[key] = dict(meta, bytes=Path(src).stat().st_size, created=_now())
+            _write_json(self.manifest_path, self.manifest)
+
+
+class Checkpoint:
+    """Per-chapter progress of a run (status, path, bytes, duration, error) in a JSON file.
+
+    Written after every chapter, so an interrupted or partly failed run can be
+    re-run and only the missing or failed chapters are synthesized again. The
+    text each finished chunk was voiced from is kept too, so an edited chunk
+    can be patched instead of redone (see previous()).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.chapters = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.chapters = json.load(f).get("chapters", {})
+        self._lock = threading.Lock()
+
+    def done(self, name, key):
+        """The finished chunk for name if it is still on disk and was made from key, else None."""
+        entry = self.chapters.get(name)
+        if not entry or entry["status"] != "done" or entry.get("key") != key:
+            return None
+        path = Path(entry["path"])
+        if not path.exists() or path.stat().st_size != entry["bytes"]:
+            return None
+        return path
+
+    def mark_done(self, name, key, path, **stats):
+        """Record a finished chapter; stats are extra per-chapter numbers (attempts, ttfb, kbps...)."""
+        path = Path(path)
+        stats.update(status="done", key=key, path=str(path), bytes=path.stat().st_size, duration=mp3_duration(path))
+        self._update(name, **stats)
+
+    def previous(self, name):
+        """The last finished entry for name (text, voice, path...) whose audio is still on disk, or None."""
+        entry = self.chapters.get(name)
+        if entry and entry["status"] == "failed":
+            entry = entry.get("previous")
+        if not entry or entry["status"] != "done" or "text" not in entry:
+            return None
+        path = Path(entry["path"])
+        return entry if path.exists() and path.stat().st_size == entry["bytes"] else None
+
+    def mark_failed(self, name, key, error):
+        self._update(name, status="failed", key=key, error=str(error), previous=self.previous(name))
+
+    def failed(self):
+        return [name for name, entry in self.chapters.items() if entry["status"] == "failed"]
+
+    def _update(self, name, **entry):
+        with self._lock:
+            self.chapters[name] = dict(entry, updated=_now())
+            _write_json(self.path, {"chapters": self.chapters})
+
+
+def _quantile(values, q):
+    """Nearest-rank quantile of values (None if empty)."""
+    values = sorted(v for v in values if v is not None)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+
+def run_stats(requests, wall_seconds):
+    """Aggregates of Telemetry request records over a run that took wall_seconds."""
+    def total(key):
+        return sum(r.get(key) or 0 for r in requests)
+
+    statuses = {}
+    for r in requests:
+        statuses[r["status"]] = statuses.get(r["status"], 0) + 1
+    sent = [r for r in requests if r["status"] in ("synthesized", "patched")]
+    wall = max(wall_seconds, 1e-6)
+    return {
+        "chunks": len(requests),
+        "statuses": statuses,
+        "api_requests": total("attempts"),
+        "retries": total("retries"),
+        "billed_chars": total("billed_chars"),
+        "audio_seconds": round(total("audio_seconds"), 3),
+        "bytes": total("bytes"),
+        "wall_seconds": round(wall_seconds, 3),
+        "chars_per_second": round(total("billed_chars") / wall, 1),
+        "audio_seconds_per_second": round(total("audio_seconds") / wall, 2),
+        "cache_hit_rate": round((statuses.get("cached", 0) + statuses.get("resumed", 0)) / len(requests), 3)
+        if requests else 0.0,
+        "throttled_seconds": round(total("throttled"), 3),
+        **{f"{key}_p{round(q * 100)}": _quantile([r.get(key) for r in sent], q)
+           for key in ("queue_wait", "ttfb", "latency") for q in (0.5, 0.95)},
+    }
+
+
+class Telemetry:
+    """Throughput and cost metrics of a run, for tuning chunk size, concurrency and model choice.
+
+    record() appends one JSON line per chunk to path (queue wait, TTFB,
+    latency, billed chars, retries, bytes and audio seconds returned by the
+    API, so 0 for cached or resumed chunks...). finish() appends
+    a {"type": "run"} line with the aggregates of run_stats(), overall and
+    per model, and rewrites <path stem>.prom: a Prometheus text-format
+    snapshot of the same numbers (e.g. for node_exporter's textfile collector).
+    The JSON lines accumulate across runs, so runs can be compared.
+    """
+
+    PREFIX = "podcast_tts"
+
+    def __init__(self, path, **labels):
+        self.path = Path(path)
+        self.prom_path = self.path.with_suffix(".prom")
+        self.run = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        self.labels = labels        # run-wide settings: backend, max_in_flight...
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def record(self, **fields):
+        entry = dict(type="request", run=self.run, time=_now(), **fields)
+        with self._lock:
+            self.requests.append(entry)
+            self._append(entry)
+
+    def finish(self, wall_seconds):
+        """Write the run aggregates (JSON line + Prometheus snapshot) and return them."""
+        models = sorted({r["model_id"] for r in self.requests})
+        summary = dict(type="run", run=self.run, time=_now(), **self.labels, **run_stats(self.requests, wall_seconds),
+                       by_model={m: run_stats([r for r in self.requests if r["model_id"] == m], wall_seconds)
+                                 for m in models})
+        with self._lock:
+            self._append(summary)
+        tmp = self.prom_path.with_name(self.prom_path.name + ".tmp")
+        tmp.write_text(self.prometheus(summary), encoding="utf-8")
+        os.replace(tmp, self.prom_path)
+        return summary
+
+    def prometheus(self, summary):
+        """Prometheus text exposition of a finish() summary, one series per model."""
+        run_labels = {key: value for key, value in self.labels.items() if isinstance(value, str)}
+        lines = []
+
+        def metric(name, kind, help_text, values):
+            lines.append(f"# HELP {self.PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {self.PREFIX}_{name} {kind}")
+            for labels, value in values:
+                if value is None:
+                    continue
+                labels = ",".join(f'{k}="{v}"' for k, v in dict(run_labels, **labels).items())
+                lines.append(f"{self.PREFIX}_{name}{{{labels}}} {value}")
+
+        by_model = summary["by_model"].items()
+        metric("chunks_total", "counter", "Chunks handled, by outcome.",
+               [({"model": m, "status": status}, n) for m, s in by_model for status, n in sorted(s["statuses"].items())])
+        metric("api_requests_total", "counter", "TTS API requests sent, retries included.",
+               [({"model": m}, s["api_requests"]) for m, s in by_model])
+        metric("retries_total", "counter", "TTS API requests that were retries.",
+               [({"model": m}, s["retries"]) for m, s in by_model])
+        metric("billed_characters_total", "counter", "Characters sent to the TTS API.",
+               [({"model": m}, s["billed_chars"]) for m, s in by_model])
+        metric("audio_seconds_total", "counter", "Seconds of audio returned by the TTS API.",
+               [({"model": m}, s["audio_seconds"]) for m, s in by_model])
+        metric("audio_bytes_total", "counter", "MP3 bytes returned by the TTS API.",
+               [({"model": m}, s["bytes"]) for m, s in by_model])
+        metric("throttled_seconds_total", "counter", "Seconds spent waiting for rate limit quota.",
+               [({"model": m}, s["throttled_seconds"]) for m, s in by_model])
+        metric("characters_per_second", "gauge", "Billed characters per wall-clock second of the run.",
+               [({"model": m}, s["chars_per_second"]) for m, s in by_model])
+        metric("audio_seconds_per_second", "gauge", "Audio seconds synthesized per wall-clock second of the run.",
+               [({"model": m}, s["audio_seconds_per_second"]) for m, s in by_model])
+        metric("cache_hit_ratio", "gauge", "Share of chunks taken from the cache or an earlier run.",
+               [({"model": m}, s["cache_hit_rate"]) for m, s in by_model])
+        for key, help_text in (("queue_wait", "Seconds a chunk waited for a worker."),
+                               ("ttfb", "Seconds from request to first audio byte."),
+                               ("latency", "Seconds from pickup to finished chunk, retries included.")):
+            metric(f"{key}_seconds", "gauge", f"{help_text} (quantiles over synthesized chunks)",
+                   [({"model": m, "quantile": q}, s[f"{key}_p{p}"]) for m, s in by_model
+                    for q, p in (("0.5", 50), ("0.95", 95))])
+        metric("run_seconds", "gauge", "Wall-clock seconds of the last run.", [({}, summary["wall_seconds"])])
+        metric("last_run_timestamp_seconds", "gauge", "When the last run finished.", [({}, round(time.time()))])
+        return "\n".join(lines) + "\n"
+
+    def _append(self, entry):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+@dataclass
+class Job:
+    """One episode: which script to read, with which voice/model/settings, and where the MP3 goes.
+
+    Plain data, so a batch can be described in JSON (see Job.from_dict). By
+    default the episode is written next to its script as <script stem>.mp3 and
+    its chunks go to audio_chunks/<output stem>/ beside it.
+    """
+
+    script: Path
+    output: Path = None
+    voice_id: str = DEFAULT_VOICE_ID
+    model_id: str = DEFAULT_MODEL
+    voice_settings: dict = field(default_factory=lambda: dict(DEFAULT_VOICE_SETTINGS))
+    chunk_chars: int = None
+    chunks_dir: Path = None
+
+    def __post_init__(self):
+        self.script = Path(self.script)
+        self.output = Path(self.output) if self.output else self.script.with_suffix(".mp3")
+        self.chunks_dir = Path(self.chunks_dir) if self.chunks_dir else self.output.parent / "audio_chunks" / self.output.stem
+        self.chunk_chars = self.chunk_chars or chunk_budget(self.model_id)
+
+    @classmethod
+    def from_dict(cls, spec, base_dir="."):
+        """Job from a JSON-style dict; relative paths are resolved against base_dir."""
+        spec = dict(spec)
+        for key in ("script", "output", "chunks_dir"):
+            if spec.get(key):
+                spec[key] = Path(base_dir) / spec[key]
+        return cls(**spec)
+
+
+class _Episode:
+    """Run state of one Job inside Engine.run()."""
+
+    def __init__(self, job, cache_tag):
+        self.job = job
+        self.chapters = list(parse_chapters(job.script))
+        self.chunks = list(pack_chunks(self.chapters, job.chunk_chars))
+        job.chunks_dir.mkdir(parents=True, exist_ok=True)
+        self.checkpoint = Checkpoint(job.chunks_dir / "checkpoint.json")
+        self.keys = [chunk_key(c["text"], job.voice_id, job.model_id, job.voice_settings, cache_tag) for c in self.chunks]
+        self.voice = chunk_key("", job.voice_id, job.model_id, job.voice_settings, cache_tag)  # patches must match it
+        self.writer = Mp3Writer(job.output, self.chapters) if self.chunks else None
+        self.assembler = OrderedAssembler(self.writer) if self.writer else None
+        self.results = [None] * len(self.chunks)
+        self.metrics = [None] * len(self.chunks)   # timings of each chunk, for Telemetry
+        self.failed = []
+        self.error = None
+
+    @property
+    def name(self):
+        return self.job.output.stem
+
+
+class Engine:
+    """Renders Jobs: chunking, content-hash cache, resumable concurrent synthesis and in-order assembly.
+
+    All chunks of all jobs go through one pool of max_in_flight workers,
+    interleaved so every episode gets a fair share of the characters (see
+    fair_order) and, with a RateLimiter, paced to the account's quotas. Each
+    episode is assembled while its later chunks are still in flight. A chunk
+    whose text was edited since the last run is patched (see plan_patch):
+    only the changed sentences are sent and spliced into the previous audio.
+    Every chunk's timings and costs go to a Telemetry log (metrics_path,
+    default podcast-metrics.jsonl next to the first output).
+    """
+
+    def __init__(self, backend, max_in_flight=MAX_IN_FLIGHT, cache_dir=None, log=print, limiter=None,
+                 metrics_path=None):
+        self.backend = backend
+        self.max_in_flight = max_in_flight
+        self.limiter = limiter
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.metrics_path = Path(metrics_path) if metrics_path else None
+        lock = threading.Lock()
+
+        def locked_log(message):  # worker threads log too; keep lines whole
+            with lock:
+                log(message)
+        self.log = locked_log
+
+    def run(self, jobs):
+        """Render every job; returns one summary dict per job (ok, output, failed, seconds, chapters...)."""
+        episodes = []
+        for job in jobs:
+            episode = _Episode(job, self.backend.cache_tag)
+            if not episode.chunks:
+                self.log(f"❌ {job.script.name}: no script text found")
+            else:
+                self.log(f"📝 {job.script.name}: {len(episode.chapters)} chapters, "
+                         f"{sum(c['chars'] for c in episode.chapters)} chars -> {len(episode.chunks)} requests "
+                         f"of up to {job.chunk_chars} chars ({job.model_id})")
+            episodes.append(episode)
+        cache_dir = self.cache_dir or (jobs[0].output.parent / "audio_cache" if jobs else None)
+        self.cache = ChunkCache(cache_dir) if cache_dir else None
+        metrics_path = self.metrics_path or (jobs[0].output.parent / "podcast-metrics.jsonl" if jobs else None)
+        self.telemetry = metrics_path and Telemetry(
+            metrics_path, backend=self.backend.name, max_in_flight=self.max_in_flight,
+            rpm=self.limiter.requests_per_min if self.limiter else 0,
+            cpm=self.limiter.chars_per_min if self.limiter else 0)
+
+        tasks = list(fair_order([[(c["chars"], (episode, i)) for i, c in enumerate(episode.chunks, 1)]
+                                 for episode in episodes]))
+        self.total = len(tasks)
+        self.log(f"\n🎙️ Synthesizing {self.total} chunks from {len(episodes)} episodes, up to {self.max_in_flight} "
+                 f"in flight ({self.backend.describe()})...\n")
+        self.started = time.perf_counter()
+        try:
+            synthesize_all(tasks, lambda n, task: self._synthesize(*task), self.max_in_flight,
+                           on_done=self._done, on_error=self._failed)
+        except BaseException:
+            for episode in episodes:
+                if episode.writer:
+                    episode.writer.discard()
+            raise
+        results = [self._finish(episode) for episode in episodes]
+        if self.telemetry and self.telemetry.requests:
+            run = self.telemetry.finish(time.perf_counter() - self.started)
+            mins, secs = divmod(int(run['audio_seconds']), 60)
+            self.log(f"\n📊 {run['billed_chars']} chars billed in {run['wall_seconds']:.1f}s "
+                     f"({run['chars_per_second']:.0f} chars/s), {mins}:{secs:02d} of audio synthesized "
+                     f"({run['audio_seconds_per_second']:.1f}x realtime), {run['retries']} retries, "
+                     f"cache hit rate {run['cache_hit_rate']:.0%}")
+            self.log(f"   Metrics: {self.telemetry.path} + {self.telemetry.prom_path.name}")
+        return results
+
+    def _synthesize(self, episode, i):
+        picked = time.perf_counter()
+        metrics = episode.metrics[i - 1] = {"queue_wait": round(picked - self.started, 3), "attempts": 0}
+        try:
+            return self._render(episode, i, metrics)
+        finally:
+            metrics["latency"] = round(time.perf_counter() - picked, 3)
+
+    def _render(self, episode, i, metrics):
+        job, chunk, key = episode.job, episode.chunks[i - 1], episode.keys[i - 1]
+        chunk_file = job.chunks_dir / f"{i:02d}_{chunk['name']}.mp3"
+        if episode.checkpoint.done(chunk['name'], key) == chunk_file:
+            return chunk_file, "resumed", None
+        done = {"chapters": chunk['chapters'], "text": chunk['text'], "voice": episode.voice}
+        cached = self.cache and self.cache.fetch(key, chunk_file)
+        if cached:
+            episode.checkpoint.mark_done(chunk['name'], key, chunk_file, sentences=cached.get("sentences"), **done)
+            return chunk_file, "cached", None
+
+        metrics["attempts"] = 1
+
+        def progress(received):
+            self.log(f"   ↓ {chunk['name']}: {received / 1024:.0f} KB received")
+
+        def retrying(attempt, e, delay):
+            metrics["attempts"] += 1
+            self.log(f"⚠️  {chunk['name']}: {e} — retry {attempt} in {delay:.1f}s")
+
+        try:
+            stats = self._patch(episode, chunk, chunk_file, progress, retrying)
+            how = "patched" if stats else "synthesized"
+            stats = stats or with_retries(lambda: self._request(chunk['name'], chunk['text'], job, chunk_file, progress),
+                                          on_retry=retrying)
+        except Exception as e:
+            episode.checkpoint.mark_failed(chunk['name'], key, e)
+            raise
+        done["sentences"] = stats.pop("sentences")
+        if self.cache:
+            self.cache.store(key, chunk_file, name=chunk['name'], chars=chunk['chars'],
+                             voice_id=job.voice_id, model_id=job.model_id, sentences=done["sentences"])
+        episode.checkpoint.mark_done(chunk['name'], key, chunk_file, attempts=metrics["attempts"], **done, **stats)
+        return chunk_file, how, stats
+
+    def _patch(self, episode, chunk, chunk_file, progress, retrying):
+        """Re-synthesize only the sentences of chunk that changed since its last run and splice them
+        into that run's audio; returns stats, or None if the chunk has to be synthesized whole."""
+        previous = episode.checkpoint.previous(chunk['name'])
+        if not previous or previous.get("voice") != episode.voice:
+            return None
+        if not previous.get("sentences"):
+            self.log(f"   {chunk['name']}: no sentence timings from the last run — synthesizing the whole chunk")
+            return None
+        old_path = Path(previous["path"])
+        try:
+            plan = plan_patch(previous["text"], previous["sentences"], chunk['text'], old_path)
+        except ValueError:
+            plan = None
+        if not plan:
+            return None
+
+        started = time.perf_counter()
+        stats = {"ttfb": None, "throttled": 0.0, "billed_chars": plan["chars"], "patched": len(plan["windows"]),
+                 "bytes": 0, "audio_seconds": 0.0}
+        try:
+            for n, window in enumerate(plan["windows"]):
+                if not window["text"]:
+                    continue  # sentences were only deleted
+                window["audio"] = chunk_file.with_name(f"{chunk_file.stem}.patch{n}.mp3")
+                result = with_retries(lambda: self._request(chunk['name'], window["text"], episode.job, window["audio"],
+                                                            None, window["context"]), on_retry=retrying)
+                stats["ttfb"] = stats["ttfb"] if stats["ttfb"] is not None else result["ttfb"]
+                stats["throttled"] += result["throttled"]
+                stats["bytes"] += result["bytes"]
+                stats["audio_seconds"] += result["audio_seconds"]
+                window["times"] = result["sentences"]
+            stats["sentences"] = apply_patch(old_path, plan, chunk_file)
+            if len(stats["sentences"]) != len(split_sentences(chunk['text'])):
+                raise ValueError("patched timings do not cover every sentence")
+        except ValueError as e:
+            self.log(f"⚠️  {chunk['name']}: cannot splice ({e}) — synthesizing the whole chunk")
+            return None
+        finally:
+            for window in plan["windows"]:
+                if window.get("audio"):
+                    window["audio"].unlink(missing_ok=True)
+        seconds = time.perf_counter() - started
+        self.log(f"🩹 {chunk['name']}: {len(plan['windows'])} changed passage(s), "
+                 f"{plan['chars']} of {chunk['chars']} chars re-synthesized")
+        return dict(stats, seconds=round(seconds, 3), audio_seconds=round(stats["audio_seconds"], 3),
+                    kbps=round(stats["bytes"] / 1024 / max(seconds - (stats["ttfb"] or 0), 1e-6), 1))
+
+    def _request(self, name, text, job, dest, progress, context=None):
+        waited = self.limiter.acquire(len(text)) if self.limiter else 0.0
+        if waited > 1:
+            self.log(f"⏳ {name}: waited {waited:.1f}s for rate limit quota")
+        stats = self.backend.synthesize(text, job, dest, progress, context)
+        stats["throttled"] = round(waited, 3)
+        stats["audio_seconds"] = round(mp3_duration(dest), 3)
+        stats["sentences"] = sentence_times(text, stats.pop("alignment", None))
+        return stats
+
+    STATUS = {"synthesized": "✅", "patched": "🩹 patched", "cached": "♻️  cached", "resumed": "⏭️  done earlier"}
+
+    def _done(self, n, task, result):
+        episode, i = task
+        chunk = episode.chunks[i - 1]
+        chunk_file, how, stats = result
+        episode.results[i - 1] = result
+        timing = f" (TTFB {stats['ttfb']:.2f}s, {stats['kbps']:.0f} KB/s)" if stats and stats["ttfb"] is not None else ""
+        self.log(f"[{n}/{self.total}] {episode.name}/{chunk['name']}: {chunk['chars']} chars "
+                 f"{self.STATUS[how]} {chunk_file.stat().st_size / 1024:.1f} KB{timing}")
+        stats = stats or {}  # cached and resumed chunks cost nothing and produced nothing this run
+        self._record(episode, i, how, stats, billed_chars=stats.get("billed_chars", chunk['chars'] if stats else 0),
+                     bytes=stats.get("bytes", 0), audio_seconds=stats.get("audio_seconds", 0.0))
+        if episode.error:
+            return
+        try:
+            episode.assembler.add(i, chunk_file, chunk)
+        except ValueError as e:
+            episode.error = e
+            episode.writer.discard()
+
+    def _failed(self, n, task, e):
+        episode, i = task
+        episode.failed.append(episode.chunks[i - 1]['name'])
+        self.log(f"[{n}/{self.total}] {episode.name}/{episode.chunks[i - 1]['name']}: ❌ {e}")
+        self._record(episode, i, "failed", error=str(e))
+
+    def _record(self, episode, i, status, stats=None, **fields):
+        if not self.telemetry:
+            return
+        job, chunk, metrics = episode.job, episode.chunks[i - 1], episode.metrics[i - 1] or {}
+        stats = stats or {}
+        self.telemetry.record(
+            job=episode.name, chunk=chunk['name'], index=i, status=status, model_id=job.model_id,
+            voice_id=job.voice_id, chunk_budget=job.chunk_chars, chars=chunk['chars'],
+            queue_wait=metrics.get("queue_wait"), throttled=stats.get("throttled", 0.0), ttfb=stats.get("ttfb"),
+            latency=metrics.get("latency"), attempts=metrics.get("attempts", 0),
+            retries=max(0, metrics.get("attempts", 0) - 1), **fields)
+
+    def _finish(self, episode):
+        job = episode.job
+        summary = {"job": job, "output": job.output, "ok": False, "failed": episode.failed,
+                   "reused": sum(1 for r in episode.results if r and r[1] in ("cached", "resumed")),
+                   "patched": sum(1 for r in episode.results if r and r[1] == "patched")}
+        if not episode.chunks:
+            return summary
+        if episode.failed or episode.error:
+            episode.writer.discard()
+            if episode.failed:
+                self.log(f"\n❌ {job.output.name}: {len(episode.failed)}/{len(episode.chunks)} chunks failed: "
+                         f"{', '.join(episode.failed)}")
+                self.log(f"📋 Progress saved to {episode.checkpoint.path} — re-run to resume the missing chunks")
+            else:
+                self.log(f"\n❌ {job.output.name}: could not assemble: {episode.error}")
+            return summary
+        merged = episode.writer.close()
+        chapters_file = job.output.with_suffix(".chapters.json")
+        write_chapters_json(chapters_file, merged['chapters'])
+        mins, secs = divmod(int(merged['seconds']), 60)
+        self.log(f"\n✅ {job.output} — {mins}:{secs:02d}, {merged['bytes'] / (1024*1024):.2f} MB, "
+                 f"{merged['kbps']:.0f} kbps, {merged['frames']} frames "
+                 f"({summary['reused']}/{len(episode.chunks)} chunks reused, {summary['patched']} patched)")
+        for chapter in merged['chapters']:
+            m, s = divmod(int(chapter['start']), 60)
+            self.log(f"   {m:2d}:{s:02d}  {chapter['title']}")
+        self.log(f"📑 Chapter markers: ID3 CHAP/CTOC + {chapters_file.name}")
+        summary.update(merged, ok=True, chapters_file=chapters_file)
+        return summary
+
+
+def make_backend(name, api_key=None, base_url=None, max_connections=MAX_IN_FLIGHT):
+    """Backend by name ("rest", "sdk", "mock"); api_key defaults to $ELEVENLABS_API_KEY."""
+    api_key = api_key or os.getenv("ELEVENLABS_API_KEY", "")
+    if name == "mock":
+        api_key = api_key or "mock"
+    elif not api_key:
+        raise SystemExit("❌ ELEVENLABS_API_KEY is not set")
+    base_url = base_url or os.getenv("ELEVENLABS_BASE_URL", API_URL)
+    return BACKENDS[name](api_key, base_url, max_connections)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render podcast scripts to MP3 with chapter markers.")
+    parser.add_argument("scripts", nargs="*", help="podcast scripts, directories or glob patterns")
+    parser.add_argument("--jobs", help="JSON list of job specs (script, output, voice_id, model_id, voice_settings...)")
+    parser.add_argument("--voice", default=DEFAULT_VOICE_ID, help="voice id for scripts given on the command line")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="model id for scripts given on the command line")
+    parser.add_argument("--backend", choices=BACKENDS, default="rest")
+    parser.add_argument("--base-url", help=f"API base URL (default $ELEVENLABS_BASE_URL or {API_URL})")
+    parser.add_argument("-j", "--max-in-flight", type=int, default=MAX_IN_FLIGHT, help="concurrent TTS requests")
+    parser.add_argument("--rpm", type=float, default=REQUESTS_PER_MIN, help="max requests per minute (0 = unlimited)")
+    parser.add_argument("--cpm", type=float, default=CHARS_PER_MIN, help="max characters per minute (0 = unlimited)")
+    parser.add_argument("--out-dir", help="write episodes here instead of next to their scripts")
+    parser.add_argument("--cache-dir", help="chunk cache (default: audio_cache/ next to the first output)")
+    parser.add_argument("--metrics", help="per-request metrics, JSON lines; a .prom snapshot is written beside it "
+                                          "(default: podcast-metrics.jsonl next to the first output)")
+    args = parser.parse_args(argv)
+
+    out_dir = Path(args.out_dir) if args.out_dir else None
+    jobs = [Job(script, output=out_dir / f"{script.stem}.mp3" if out_dir else None, voice_id=args.voice, model_id=args.model)
+            for script in expand_scripts(args.scripts)]
+    if args.jobs:
+        with open(args.jobs, "r", encoding="utf-8") as f:
+            jobs += [Job.from_dict(spec, Path(args.jobs).parent) for spec in json.load(f)]
+    if not jobs:
+        parser.error("give at least one script or --jobs")
+
+    backend = make_backend(args.backend, base_url=args.base_url, max_connections=args.max_in_flight)
+    try:
+        limiter = RateLimiter(args.rpm, args.cpm) if args.rpm or args.cpm else None
+        results = Engine(backend, args.max_in_flight, args.cache_dir, limiter=limiter,
+                         metrics_path=args.metrics).run(jobs)
+    finally:
+        backend.close()
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Navitas Energy — pitch deck benchmark
+Renders create_pitch.py against synthetic photo fixtures and reports wall time,
+peak RSS, per-helper time and output bytes, so runs can be compared across commits.
+
+    python bench_pitch.py --out bench.json
+    python bench_pitch.py --compare bench.json
+"""
+
+from collections import defaultdict
+import os, sys, io, json, time, random, shutil, argparse, resource, statistics, subprocess, tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Source resolutions roughly matching the real photo set
+FIXTURE_SIZES = {
+    'kaplan_aerial': (6000, 4000),  # drone shot
+    'large_array': (4608, 3456),
+    'logo_white': (1200, 400),      # RGBA PNG
+}
+PHONE_PHOTO = (4000, 3000)
+
+# Helpers timed per call (inclusive: draw_img_card includes cached_img, etc.)
+HELPERS = ['_prepare_img', '_disk_img', 'cached_img', 'img_size', 'draw_img_card', 'gradient',
+           'chrome', 'bg', 'card', 'stat', 'accent', 'footer', 'dark_overlay']
+
+SCENARIOS = {
+    'cold_full': 'ES + EN, empty caches, every page rendered',
+    'warm_disk': 'ES + EN, prepared images on disk, every page rendered',
+    'incremental_noop': 'ES + EN, page cache warm, nothing changed',
+    'pages': 'each page function alone, images in memory',
+}
+
+
+def make_fixtures(fixture_dir, imgs):
+    """Write a deterministic photo-like fixture for every IMGS entry (skips existing files)."""
+    from PIL import Image, ImageFilter
+    os.makedirs(fixture_dir, exist_ok=True)
+    for i, (key, src) in enumerate(sorted(imgs.items())):
+        path = os.path.join(fixture_dir, os.path.basename(src))
+        if os.path.exists(path):
+            continue
+        w, h = FIXTURE_SIZES.get(key, PHONE_PHOTO)
+        rnd = random.Random(i)
+        # Low-res random texture upscaled over a gradient gives JPEG-realistic entropy
+        tex = Image.frombytes('RGB', (w // 10, h // 10), rnd.randbytes(w // 10 * h // 10 * 3))
+        tex = tex.resize((w, h), Image.BICUBIC).filter(ImageFilter.GaussianBlur(2))
+        grad = Image.linear_gradient('L').resize((w, h)).convert('RGB')
+        img = Image.blend(tex, grad, 0.5)
+        if path.lower().endswith('.png'):
+            img = img.convert('RGBA')
+            img.putalpha(Image.linear_gradient('L').rotate(90).resize((w, h)))
+            img.save(path)
+        else:
+            img.save(path, quality=92)
+
+
+def _instrument(cp):
+    """Wrap HELPERS in create_pitch with timers; returns ({name: [calls, seconds]}, [names not found]).
+
+    Helpers missing from this version of create_pitch (renamed, or not yet
+    written in an older commit) are skipped, so any commit can be benchmarked.
+    """
+    stats = defaultdict(lambda: [0, 0.0])
+    missing = []
+    for name in HELPERS:
+        fn = getattr(cp, name, None)
+        if fn is None:
+            missing.append(name)
+            continue
+
+        def timed(*args, _fn=fn, _name=name, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return _fn(*args, **kwargs)
+            finally:
+                stats[_name][0] += 1
+                stats[_name][1] += time.perf_counter() - t0
+
+        setattr(cp, name, timed)
+    return stats, missing
+
+
+def _peak_rss_kb():
+    """Peak RSS of this process. Linux ru_maxrss survives exec, so prefer VmHWM."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss  # macOS reports bytes
+
+
+def _child(scenario, repeat):
+    """Run one scenario in this (fresh) process and print its JSON result."""
+    sys.path.insert(0, HERE)
+    import create_pitch as cp
+    from reportlab.pdfgen import canvas
+
+    helpers, missing = _instrument(cp)
+    walls, out_bytes = [], 0
+    if scenario == 'pages':
+        pages = cp.VARIANTS['energy']['pages']
+        per_page, page_bytes = defaultdict(list), {}
+        for lang_code in cp.LANG:
+            for page in pages:  # warm the in-memory image cache
+                page(canvas.Canvas(io.BytesIO()), cp.LANG[lang_code])
+        helpers.clear()
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for page in pages:
+                p0 = time.perf_counter()
+                buf = io.BytesIO()
+                pdf = canvas.Canvas(buf)
+                page(pdf, cp.LANG['en'])
+                pdf.save()
+                per_page[page.__name__].append(time.perf_counter() - p0)
+                page_bytes[page.__name__] = len(buf.getvalue())
+            walls.append(time.perf_counter() - t0)
+        out_bytes = sum(page_bytes.values())
+        extra = {'per_page_s': {name: statistics.median(t) for name, t in per_page.items()},
+                 'per_page_bytes': page_bytes}
+    else:
+        incremental = scenario == 'incremental_noop'
+        for _ in range(repeat):
+            if scenario == 'cold_full':
+                shutil.rmtree(cp.CACHE_DIR, ignore_errors=True)
+            cp._img_cache.clear()
+            cp._img_cache_bytes = 0
+            t0 = time.perf_counter()
+            paths = [cp.build_pdf(lang_code, 'energy', incremental) for lang_code in ('es', 'en')]
+            walls.append(time.perf_counter() - t0)
+        out_bytes = sum(os.path.getsize(p) for p in paths)
+        extra = {'images': dict(cp.IMG_STATS), 'pages': dict(cp.PAGE_STATS)}
+
+    result = {
+        'wall_s': statistics.median(walls),
+        'peak_rss_kb': _peak_rss_kb(),
+        'bytes': out_bytes,
+        'helpers': {name: {'calls': n // repeat, 's': t / repeat} for name, (n, t) in sorted(helpers.items())},
+        'missing_helpers': missing,
+        **extra,
+    }
+    print(json.dumps(result))
+
+
+def _run(scenario, env, repeat=1):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', scenario, '--repeat', str(repeat)],
+                         env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run_suite(fixture_dir, work_dir, repeat):
+    sys.path.insert(0, HERE)
+    import create_pitch as cp
+    make_fixtures(fixture_dir, cp.IMGS)
+    env = dict(os.environ, NAVITAS_IMG_DIR=fixture_dir, NAVITAS_LOGO_DIR=fixture_dir)
+
+    results = {}
+    for scenario in SCENARIOS:
+        print(f'  ▸ {scenario}: {SCENARIOS[scenario]}', flush=True)
+        run_dir = tempfile.mkdtemp(prefix=f'{scenario}-', dir=work_dir)
+        env.update(PITCH_OUT_DIR=run_dir, PITCH_CACHE_DIR=os.path.join(run_dir, '.cache'))
+        if scenario != 'cold_full':
+            _run('incremental_noop', env)  # prime disk and page caches
+        results[scenario] = _run(scenario, env, repeat)
+    return results
+
+
+def _git_rev():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def report(results, baseline=None):
+    print(f'\n{"scenario":<18} {"wall s":>8} {"peak RSS MB":>12} {"output KB":>10}')
+    for name, r in results.items():
+        line = f'{name:<18} {r["wall_s"]:8.3f} {r["peak_rss_kb"] / 1024:12.1f} {r["bytes"] / 1024:10.0f}'
+        if baseline and name in baseline:
+            b = baseline[name]
+            line += f'   ({(r["wall_s"] / b["wall_s"] - 1) * 100:+.0f}% time, {(r["bytes"] / b["bytes"] - 1) * 100:+.0f}% bytes)'
+        print(line)
+    print(f'\n{"helper (cold_full)":<18} {"calls":>8} {"s":>8}')
+    for name, h in sorted(results['cold_full']['helpers'].items(), key=lambda kv: -kv[1]['s']):
+        print(f'{name:<18} {h["calls"]:8d} {h["s"]:8.3f}')
+    for name in results['cold_full'].get('missing_helpers', []):
+        print(f'{name:<18} {"absent":>8}')
+    pages = results.get('pages', {})
+    if pages.get('per_page_bytes'):
+        print(f'\n{"page (pages)":<18} {"s":>8} {"KB":>8}')
+        for name, n in pages['per_page_bytes'].items():
+            print(f'{name:<18} {pages["per_page_s"][name]:8.3f} {n / 1024:8.0f}')
+
+
+def regressions(results, baseline, tolerance):
+    """Scenarios whose wall time or output size grew by more than tolerance (a fraction)."""
+    bad = []
+    for name, r in results.items():
+        b = baseline.get(name)
+        if b and (r['wall_s'] > b['wall_s'] * (1 + tolerance) or r['bytes'] > b['bytes'] * (1 + tolerance)):
+            bad.append(name)
+    return bad
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark pitch deck generation on synthetic fixtures.')
+    parser.add_argument('--fixtures', default=os.path.join(HERE, '.cache', 'bench-fixtures'),
+                        help='where synthetic photos are generated (kept between runs)')
+    parser.add_argument('--repeat', type=int, default=3, help='timed repetitions per warm scenario (median is reported)')
+    parser.add_argument('--out', help='write results as JSON')
+    parser.add_argument('--compare', help='JSON from an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='allowed slowdown/growth before failing --compare')
+    parser.add_argument('--child', choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.repeat)
+        sys.exit(0)
+
+    print('\n⏱️  Benchmarking pitch deck generation...\n')
+    with tempfile.TemporaryDirectory(prefix='pitch-bench-') as work_dir:
+        results = run_suite(args.fixtures, work_dir, args.repeat)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['scenarios']
+    report(results, baseline)
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'commit': _git_rev(), 'python': sys.version.split()[0], 'scenarios': results}, f, indent=2)
+        print(f'\n\U0001f4be Results written to {args.out}')
+
+    if baseline:
+        bad = regressions(results, baseline, args.tolerance)
+        if bad:
+            print(f'\n❌ Regressed beyond {args.tolerance:.0%}: {", ".join(bad)}')
+            sys.exit(1)
+        print(f'\n✅ No regressions beyond {args.tolerance:.0%}')
@@ -8,14 +8,34 @@ from reportlab.lib.pagesizes import A4
 from reportlab.lib.colors import HexColor, white, Color
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase.pdfdoc import PDFResourceDictionary
+from reportlab import rl_config
 from PIL import Image
-import os, io
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+import os, io, ast, time, math, hashlib, argparse, json, weakref, functools, tracemalloc
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # without pypdf every build renders all pages from scratch
+    PdfReader = PdfWriter = None
+
+rl_config.useA85 = 0  # embed JPEGs as raw binary; ASCII85 adds 25% to every photo
 
 W, H = A4
 M = 45  # margin
-IMG_DIR = '/Users/kanieltordjman/Desktop/projects/navitas-proposal-template/public/projects'
-LOGO_DIR = '/Users/kanieltordjman/Desktop/projects/navitas-promo/public'
-OUT_DIR = os.path.dirname(os.path.abspath(__file__))
+IMG_DIR = os.environ.get('NAVITAS_IMG_DIR', '/Users/kanieltordjman/Desktop/projects/navitas-proposal-template/public/projects')
+LOGO_DIR = os.environ.get('NAVITAS_LOGO_DIR', '/Users/kanieltordjman/Desktop/projects/navitas-promo/public')
+OUT_DIR = os.environ.get('PITCH_OUT_DIR', os.path.dirname(os.path.abspath(__file__)))
+IMG_CACHE_BYTES = int(os.environ.get('PITCH_IMG_CACHE_MB', 256)) * 1024 * 1024  # LRU budget for prepared images (JPEG + decoded RGB)
+CACHE_DIR = os.environ.get('PITCH_CACHE_DIR', os.path.join(OUT_DIR, '.cache'))
+IMG_DISK_CACHE_BYTES = 512 * 1024 * 1024  # prepared JPEGs kept across runs
+IMG_DISK_CACHE_DAYS = 30  # entries not used for this long are dropped
+IMG_LOCK_STALE_S = 120  # a cache entry lock older than this is left over from a dead worker
+JPEG_QUALITY = 88
+IMG_SCALE = 3  # pixels per point of the placed box, before any DPI cap
+IMG_BG = (15, 28, 50)  # fill behind transparent pixels
 
 # Brand colors
 NAVY = HexColor('#0a1628')
@@ -31,6 +51,8 @@ TXT = HexColor('#f1f5f9')
 TXT2 = HexColor('#94a3b8')
 TXT3 = HexColor('#64748b')
 BORDER = Color(0.12, 0.19, 0.37, 0.4)
+BG_TOP = Color(0.039, 0.086, 0.157)
+BG_BOTTOM = Color(0.057, 0.108, 0.182)
 WHITE = white
 
 # Image mapping
@@ -259,30 +281,338 @@ LANG = {
 }
 
 
-def load_img(path, max_w=None, max_h=None):
-    """Load and optionally resize image for PDF embedding."""
-    img = Image.open(path)
+# ============================================================
+# PROFILING (opt-in: --profile / --flame)
+# ============================================================
+class _Profiler:
+    """Nested span timer. Keeps per-name totals plus collapsed stacks for flame graphs.
+
+    Allocation figures come from tracemalloc, so they cover Python-side
+    allocations (buffers, ReportLab objects); Pillow pixel memory is not traced.
+    """
+
+    def __init__(self):
+        self.stack = []  # [name, child seconds]
+        self.spans = {}  # name -> [calls, total s, self s, net alloc bytes]
+        self.stacks = defaultdict(float)  # 'a;b;c' -> self seconds
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def span(self, name):
+        self.stack.append([name, 0.0])
+        t0, m0 = time.perf_counter(), tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            alloc = tracemalloc.get_traced_memory()[0] - m0
+            path = ';'.join(n for n, _ in self.stack)
+            _, child = self.stack.pop()
+            if self.stack:
+                self.stack[-1][1] += elapsed
+            entry = self.spans.setdefault(name, [0, 0.0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] += elapsed - child
+            entry[3] += alloc
+            self.stacks[path] += elapsed - child
+
+    def report(self):
+        return {
+            'spans': {name: {'calls': n, 'total_s': round(total, 6), 'self_s': round(own, 6), 'alloc_kb': alloc // 1024}
+                      for name, (n, total, own, alloc) in sorted(self.spans.items(), key=lambda kv: -kv[1][2])},
+            'peak_traced_kb': tracemalloc.get_traced_memory()[1] // 1024,
+            'stacks': {path: round(sec, 6) for path, sec in self.stacks.items()},
+        }
+
+
+_prof = None
+
+
+def enable_profiling():
+    global _prof
+    _prof = _Profiler()
+    return _prof
+
+
+def span(name):
+    """Time a block when profiling is on; free otherwise."""
+    return _prof.span(name) if _prof else nullcontext()
+
+
+def profiled(fn):
+    """Record every call of fn as a span named after it."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _prof is None:
+            return fn(*args, **kwargs)
+        with _prof.span(fn.__name__):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def write_flame(stacks, path):
+    """Collapsed-stack text (flamegraph.pl / speedscope), one 'a;b;c microseconds' line per stack."""
+    with open(path, 'w') as f:
+        for stack, sec in sorted(stacks.items()):
+            f.write(f'{stack} {int(sec * 1e6)}\n')
+
+
+# Prepared images, keyed by (path, mtime, px_w, px_h, quality) -> (reader, jpeg bytes, cache bytes)
+_img_cache = OrderedDict()
+_img_cache_bytes = 0
+_src_sizes = {}  # (path, mtime) -> intrinsic size
+IMG_STATS = {'decoded': 0, 'from_disk': 0, 'reused': 0}
+_page_imgs = None  # set() while a page is rendered for the page cache
+
+# Image tuning for the deck being built (see build_pdf)
+_deck_dpi = None  # cap on effective DPI for every placed image
+_img_tuning = {}  # (path, w, h) -> (dpi, quality) chosen to meet a size budget
+_placements = None  # (path, w, h) -> drawn (dw, dh), recorded while a deck renders
+SIZE_LADDER = [(None, 88), (200, 85), (150, 80), (150, 70), (120, 65), (96, 60), (72, 50)]
+
+
+def _prepare_img(src, px_w=None, px_h=None, quality=JPEG_QUALITY):
+    """Decode, shrink to fit px_w x px_h and flatten an image. Returns (jpeg bytes, output size).
+
+    JPEGs are decoded in draft mode: libjpeg's DCT scaling yields the smallest
+    1/2, 1/4 or 1/8 reduction that still covers the output size, so a drone
+    shot is never held in memory at full resolution. Resizing happens before
+    the RGBA flatten so the background copy is only as big as the output.
+    """
+    with span('decode'):
+        img = Image.open(src)
+        if px_w and px_h and img.format == 'JPEG':
+            ratio = min(px_w / img.width, px_h / img.height)
+            img.draft('RGB', (math.ceil(img.width * ratio), math.ceil(img.height * ratio)))
+        img.load()
+    if px_w and px_h:
+        with span('resize'):
+            img.thumbnail((px_w, px_h), Image.LANCZOS)
     if img.mode == 'RGBA':
-        bg_img = Image.new('RGB', img.size, (15, 28, 50))
+        bg_img = Image.new('RGB', img.size, IMG_BG)
         bg_img.paste(img, mask=img.split()[3])
         img = bg_img
     elif img.mode != 'RGB':
         img = img.convert('RGB')
-    if max_w and max_h:
-        img.thumbnail((max_w * 3, max_h * 3), Image.LANCZOS)
-    buf = io.BytesIO()
-    img.save(buf, format='JPEG', quality=88)
-    buf.seek(0)
-    return ImageReader(buf)
+    with span('jpeg_encode'):
+        buf = io.BytesIO()
+        img.save(buf, format='JPEG', quality=quality)
+    return buf.getvalue(), img.size
+
+
+def _disk_img(path, px_w=None, px_h=None, quality=JPEG_QUALITY):
+    """Prepare an image through the on-disk cache under CACHE_DIR/img.
+
+    Entries are content-addressed: sha256 of the source bytes plus every
+    parameter that changes the output, so a renamed or touched file still hits.
+    The source is hashed in chunks and decoded from the file, never read whole.
+    """
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    h.update(repr((px_w, px_h, quality, IMG_BG)).encode())
+    cache_path = os.path.join(CACHE_DIR, 'img', h.hexdigest() + '.jpg')
+
+    if not os.path.exists(cache_path):
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with _entry_lock(cache_path + '.lock'):  # concurrent workers: one prepares, the rest read it back
+            if not os.path.exists(cache_path):
+                with open(path, 'rb') as f:
+                    data, out_size = _prepare_img(f, px_w, px_h, quality)
+                IMG_STATS['decoded'] += 1
+                tmp = f'{cache_path}.{os.getpid()}.tmp'
+                with open(tmp, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp, cache_path)
+                return data, out_size
+
+    with open(cache_path, 'rb') as f:
+        data = f.read()
+    os.utime(cache_path)  # mark as recently used for pruning
+    IMG_STATS['from_disk'] += 1
+    return data, Image.open(io.BytesIO(data)).size  # header-only read
+
+
+@contextmanager
+def _entry_lock(lock_path):
+    """Hold an exclusive lock file, waiting while another process holds it (stale locks are broken)."""
+    while True:
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > IMG_LOCK_STALE_S:
+                    os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+            time.sleep(0.02)
+    try:
+        yield
+    finally:
+        try:
+            os.remove(lock_path)
+        except FileNotFoundError:  # broken as stale by a waiter
+            pass
+
+
+def prune_img_cache(max_bytes=IMG_DISK_CACHE_BYTES, max_days=IMG_DISK_CACHE_DAYS):
+    """Drop on-disk entries older than max_days, then least recently used until under max_bytes."""
+    img_dir = os.path.join(CACHE_DIR, 'img')
+    if not os.path.isdir(img_dir):
+        return 0
+    cutoff = time.time() - max_days * 86400
+    entries, removed = [], 0
+    for name in os.listdir(img_dir):
+        if name.endswith('.lock'):
+            continue  # held by a running build
+        fp = os.path.join(img_dir, name)
+        st = os.stat(fp)
+        if st.st_mtime < cutoff:
+            os.remove(fp)
+            removed += 1
+        else:
+            entries.append((st.st_mtime, st.st_size, fp))
+    total = sum(size for _, size, _ in entries)
+    for _, size, fp in sorted(entries):
+        if total <= max_bytes:
+            break
+        os.remove(fp)
+        total -= size
+        removed += 1
+    return removed
+
+
+def img_size(path):
+    """Intrinsic (w, h) of an image, read from its header once per (path, mtime)."""
+    key = (path, os.path.getmtime(path))
+    if key not in _src_sizes:
+        with Image.open(path) as img:
+            _src_sizes[key] = img.size
+    return _src_sizes[key]
+
+
+@profiled
+def cached_img(path, px_w=None, px_h=None, quality=JPEG_QUALITY):
+    """Return (ImageReader, JPEG size in bytes), preparing each path/box/quality once per process.
+
+    The same ImageReader is handed back on every hit, so ReportLab also keeps its
+    decoded RGB data and embeds the image once per PDF.
+    """
+    global _img_cache_bytes
+    if _page_imgs is not None:
+        _page_imgs.add(path)
+    key = (path, os.path.getmtime(path), px_w, px_h, quality)
+    entry = _img_cache.get(key)
+    if entry:
+        _img_cache.move_to_end(key)
+        IMG_STATS['reused'] += 1
+        return entry[0], entry[1]
+
+    data, (ow, oh) = _disk_img(path, px_w, px_h, quality)
+    reader = ImageReader(io.BytesIO(data))
+    nbytes = len(data) + ow * oh * 3
+    _img_cache[key] = (reader, len(data), nbytes)
+    _img_cache_bytes += nbytes
+    while _img_cache_bytes > IMG_CACHE_BYTES and len(_img_cache) > 1:
+        _, (_, _, freed) = _img_cache.popitem(last=False)
+        _img_cache_bytes -= freed
+    return reader, len(data)
+
+
+def _img_bounds(w, h, dw, dh, dpi):
+    """Pixel bounds for an image drawn at dw x dh points to fill a w x h box.
+
+    IMG_SCALE px per box point is the ceiling; a DPI further caps the pixels
+    per drawn inch.
+    """
+    px_w, px_h = int(w) * IMG_SCALE, int(h) * IMG_SCALE
+    if dpi:
+        px_w = min(px_w, math.ceil(dw * dpi / 72))
+        px_h = min(px_h, math.ceil(dh * dpi / 72))
+    return px_w, px_h
+
+
+@profiled
+def fit_images(placements, budget, dpi=None):
+    """Pick a (dpi, quality) rung of SIZE_LADDER per placed image so their JPEGs fit in budget bytes.
+
+    Greedy: the image that currently costs the most steps down one rung until
+    the total fits or every image is at the bottom. Returns (tuning, bytes).
+    """
+    ladder = [(dpi, JPEG_QUALITY)] + [(d, q) for d, q in SIZE_LADDER[1:] if not dpi or d < dpi]
+
+    def cost(key, rung):
+        (path, w, h), (dw, dh) = key, placements[key]
+        d, q = ladder[rung]
+        return cached_img(path, *_img_bounds(w, h, dw, dh, d), q)[1]
+
+    rung = dict.fromkeys(placements, 0)
+    size = {key: cost(key, 0) for key in placements}
+    while sum(size.values()) > budget:
+        movable = [key for key in rung if rung[key] < len(ladder) - 1]
+        if not movable:
+            break
+        key = max(movable, key=size.get)
+        rung[key] += 1
+        size[key] = cost(key, rung[key])
+    return {key: ladder[r] for key, r in rung.items()}, sum(size.values())
+
+
+def gradient(c, x, y, w, h, top, bottom):
+    """Fill a rect with a vertical top-to-bottom gradient (one PDF axial shading, one `sh` op)."""
+    c.saveState()
+    p = c.beginPath()
+    p.rect(x, y, w, h)
+    c.clipPath(p, stroke=0)
+    c.linearGradient(x, y + h, x, y, (top, bottom), extend=False)
+    c.restoreState()
+
+
+_chrome_seen = weakref.WeakKeyDictionary()  # canvas -> chrome keys drawn inline once
+
+
+def chrome(c, key, w, h, draw, x=0, y=0, pad=2):
+    """Place a piece of recurring vector chrome, by reference once it repeats.
+
+    The first time `key` is seen on a canvas it is drawn inline, so one-off
+    sizes cost nothing extra. On the second sighting draw(c) is recorded into a
+    Form XObject covering (0, 0, w, h) plus `pad`, and from then on every call,
+    on any page, is a single `Do` at (x, y). Only geometry and colours go in
+    the form; text is drawn by the caller.
+    """
+    name = 'chrome_' + hashlib.md5(repr(key).encode()).hexdigest()[:12]
+    if not c.hasForm(name):
+        seen = _chrome_seen.setdefault(c, set())
+        if name not in seen:
+            seen.add(name)
+            c.saveState()
+            c.translate(x, y)
+            draw(c)
+            c.restoreState()
+            return
+        c.beginForm(name, -pad, -pad, w + pad, h + pad)
+        draw(c)
+        # ReportLab gives forms only fonts and XObjects; keep the alpha states and shadings too
+        res = PDFResourceDictionary()
+        res.basicFonts()
+        res.allProcs()
+        res.ExtGState = c._extgstate.getState() or {}
+        res.setShading(c._shadingUsed)
+        c.endForm(Resources=res)
+    c.saveState()
+    c.setFillAlpha(1)  # the form assumes opaque ink, as its fresh alpha tracker did
+    c.setStrokeAlpha(1)
+    c.translate(x, y)
+    c.doForm(name)
+    c.restoreState()
 
 
 def bg(c):
-    steps = 30
-    for i in range(steps):
-        r = i / steps
-        c.setFillColor(Color(0.039 + r * 0.018, 0.086 + r * 0.022, 0.157 + r * 0.025))
-        yy = H - (H / steps) * (i + 1)
-        c.rect(0, yy, W, H / steps + 1, fill=1, stroke=0)
+    chrome(c, ('bg',), W, H, lambda c: gradient(c, 0, 0, W, H, BG_TOP, BG_BOTTOM), pad=0)
 
 
 def dark_overlay(c, x, y, w, h, opacity=0.6):
@@ -290,35 +620,48 @@ def dark_overlay(c, x, y, w, h, opacity=0.6):
     c.rect(x, y, w, h, fill=1, stroke=0)
 
 
-def card(c, x, y, w, h, border_col=BORDER):
+def _card(c, w, h, border_col):
     c.setFillColor(CARD_BG)
-    c.roundRect(x, y, w, h, 8, fill=1, stroke=0)
+    c.roundRect(0, 0, w, h, 8, fill=1, stroke=0)
     c.setStrokeColor(border_col)
     c.setLineWidth(0.5)
-    c.roundRect(x, y, w, h, 8, fill=0, stroke=1)
+    c.roundRect(0, 0, w, h, 8, fill=0, stroke=1)
+
+
+def card(c, x, y, w, h, border_col=BORDER):
+    chrome(c, ('card', w, h, repr(border_col)), w, h, lambda c: _card(c, w, h, border_col), x, y)
 
 
+@profiled
 def draw_img_card(c, x, y, w, h, img_path, radius=8):
     """Draw image inside a rounded card area."""
     c.saveState()
     p = c.beginPath()
     p.roundRect(x, y, w, h, radius)
     c.clipPath(p, stroke=0)
-    img = load_img(img_path, int(w), int(h))
     # Calculate aspect-fill
-    iw, ih = Image.open(img_path).size
+    iw, ih = img_size(img_path)
     scale = max(w / iw, h / ih)
     dw, dh = iw * scale, ih * scale
+    key = (img_path, int(w), int(h))
+    if _placements is not None:
+        _placements[key] = (dw, dh)
+    dpi, quality = _img_tuning.get(key, (_deck_dpi, JPEG_QUALITY))
+    img = cached_img(img_path, *_img_bounds(w, h, dw, dh, dpi), quality)[0]
     dx = x - (dw - w) / 2
     dy = y - (dh - h) / 2
     c.drawImage(img, dx, dy, dw, dh)
     c.restoreState()
 
 
-def accent(c, x, y, w, col=BLUE):
+def _accent(c, w, col):
     c.setStrokeColor(col)
     c.setLineWidth(2.5)
-    c.line(x, y, x + w, y)
+    c.line(0, 0, w, 0)
+
+
+def accent(c, x, y, w, col=BLUE):
+    chrome(c, ('accent', w, repr(col)), w, 0, lambda c: _accent(c, w, col), x, y)
 
 
 def stat(c, x, y, num, label, col=BLUE_L):
@@ -341,15 +684,21 @@ def footer(c, text):
 # PAGES
 # ============================================================
 
+@functools.lru_cache(maxsize=None)
+def _cover_fade(steps=256):
+    """1×steps RGBA strip, clear at the top to 92% navy at the bottom; its alpha becomes the image's SMask."""
+    img = Image.new('RGBA', (1, steps))
+    img.putdata([(10, 20, 38, round(255 * 0.92 * i / (steps - 1))) for i in range(steps)])
+    return ImageReader(img)
+
+
+@profiled
 def p1_cover(c, L):
     """Full-bleed hero image cover."""
     # Hero image - full page
     draw_img_card(c, 0, 0, W, H, IMGS['large_array'], radius=0)
-    # Dark gradient overlay (bottom heavy)
-    for i in range(40):
-        r = i / 40
-        c.setFillColor(Color(0.04, 0.08, 0.15, r * 0.92))
-        c.rect(0, H * (1 - r) * 0.65, W, H * 0.65 / 40 + 1, fill=1, stroke=0)
+    # Dark gradient overlay (bottom heavy): one soft-masked image
+    c.drawImage(_cover_fade(), 0, 0, W, H * 0.65, mask='auto')
     # Full dark bottom
     dark_overlay(c, 0, 0, W, H * 0.38, 0.93)
 
@@ -379,6 +728,7 @@ def p1_cover(c, L):
     c.showPage()
 
 
+@profiled
 def p2_about(c, L):
     """About page with branded worker photo."""
     bg(c)
@@ -473,6 +823,7 @@ def p2_about(c, L):
     c.showPage()
 
 
+@profiled
 def p3_israel(c, L):
     """Israel projects with photo grid."""
     bg(c)
@@ -546,6 +897,7 @@ def p3_israel(c, L):
     c.showPage()
 
 
+@profiled
 def p4_europe(c, L):
     """Europe expansion with worker on roof photo."""
     bg(c)
@@ -614,6 +966,7 @@ def p4_europe(c, L):
     c.showPage()
 
 
+@profiled
 def p5_panama(c, L):
     """Panama LATAM entry."""
     bg(c)
@@ -687,6 +1040,7 @@ def p5_panama(c, L):
     c.showPage()
 
 
+@profiled
 def p6_argentina(c, L):
     """Argentina opportunity."""
     bg(c)
@@ -777,6 +1131,7 @@ def p6_argentina(c, L):
     c.showPage()
 
 
+@profiled
 def p7_team(c, L):
     """Leadership page — Kaniel only, with photos."""
     bg(c)
@@ -876,6 +1231,7 @@ def p7_team(c, L):
     c.showPage()
 
 
+@profiled
 def p8_strategy(c, L):
     """Global strategy + contact."""
     bg(c)
@@ -965,33 +1321,284 @@ def p8_strategy(c, L):
 # ============================================================
 # BUILD
 # ============================================================
-def build_pdf(lang_code):
+# Deck variants: output file, document title and page sequence
+VARIANTS = {
+    'energy': {
+        'file': 'Navitas-Energy-Pitch-{suffix}.pdf',
+        'title': 'Navitas Energy \u2014 Corporate Presentation 2026 ({suffix})',
+        'pages': (p1_cover, p2_about, p3_israel, p4_europe, p5_panama, p6_argentina, p7_team, p8_strategy),
+    },
+}
+
+
+def _code_version():
+    """Hash of this file minus the LANG table: the rendering code that versions every cached page.
+
+    Copy is left out because each page's fingerprint already covers the L
+    values it read, so editing one string only re-renders the pages using it.
+    """
+    with open(os.path.abspath(__file__), encoding='utf-8') as f:
+        source = f.read()
+    lines = source.splitlines(keepends=True)
+    for node in ast.parse(source).body:
+        if isinstance(node, ast.Assign) and any(getattr(t, 'id', None) == 'LANG' for t in node.targets):
+            lines[node.lineno - 1:node.end_lineno] = []
+            break
+    return hashlib.sha256(''.join(lines).encode()).hexdigest()[:16]
+
+
+CODE_VERSION = _code_version()
+PAGE_STATS = {'rendered': 0, 'reused': 0}
+
+
+class _KeyLog(dict):
+    """Language dict that records which keys a page reads."""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.read = set()
+
+    def __getitem__(self, key):
+        self.read.add(key)
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.read.add(key)
+        return super().get(key, default)
+
+
+def _new_canvas(path, meta):
+    pdf = canvas.Canvas(path, pagesize=A4)
+    pdf.setTitle(meta['title'])
+    pdf.setAuthor(meta['author'])
+    pdf.setSubject(meta['subject'])
+    return pdf
+
+
+def _page_fingerprint(page, L, keys, imgs, placed):
+    """Hash of the code version, the L values a page read, the images it drew and their tuning."""
+    fp = hashlib.sha256(f'{CODE_VERSION}:{page.__name__}'.encode())
+    for key in sorted(keys):
+        fp.update(repr((key, L.get(key))).encode())
+    for img_path in sorted(imgs):
+        fp.update(repr((img_path, os.path.getmtime(img_path))).encode())
+    for img_path, w, h, _, _ in sorted(placed):
+        fp.update(repr((img_path, w, h, _img_tuning.get((img_path, w, h), (_deck_dpi, JPEG_QUALITY)))).encode())
+    return fp.hexdigest()
+
+
+def _cached_page(page, L, stem, meta):
+    """Return a single-page PDF for page, re-rendering only if its fingerprint changed."""
+    global _page_imgs, _placements
+    pdf_path, manifest_path = stem + '.pdf', stem + '.json'
+    if os.path.exists(pdf_path) and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        placed = manifest.get('placed', [])
+        if all(os.path.exists(p) for p in manifest['imgs']):
+            if _page_fingerprint(page, L, manifest['keys'], manifest['imgs'], placed) == manifest['fp']:
+                if _placements is not None:
+                    _placements.update({(p, w, h): (dw, dh) for p, w, h, dw, dh in placed})
+                PAGE_STATS['reused'] += 1
+                return pdf_path
+
+    logged = _KeyLog(L)
+    outer, _page_imgs, _placements = _placements, set(), {}
+    tmp = f'{pdf_path}.{os.getpid()}.tmp'
+    try:
+        pdf = _new_canvas(tmp, meta)
+        page(pdf, logged)
+        with span('pdf.save'):
+            pdf.save()
+        imgs, placements = sorted(_page_imgs), _placements
+    finally:
+        _page_imgs, _placements = None, outer
+    if outer is not None:
+        outer.update(placements)
+    os.replace(tmp, pdf_path)
+    placed = sorted([p, w, h, dw, dh] for (p, w, h), (dw, dh) in placements.items())
+    manifest = {'keys': sorted(logged.read), 'imgs': imgs, 'placed': placed,
+                'fp': _page_fingerprint(page, L, logged.read, imgs, placed)}
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+    PAGE_STATS['rendered'] += 1
+    return pdf_path
+
+
+def _render_deck(path, L, V, lang_code, variant, meta, incremental):
+    if incremental and PdfWriter is not None:
+        page_dir = os.path.join(CACHE_DIR, 'pages')
+        os.makedirs(page_dir, exist_ok=True)
+        writer = PdfWriter()
+        for page in V['pages']:
+            stem = os.path.join(page_dir, f'{variant}-{lang_code}-{page.__name__}')
+            writer.add_page(PdfReader(_cached_page(page, L, stem, meta)).pages[0])
+        if hasattr(writer, 'compress_identical_objects'):  # pypdf >= 4.3
+            writer.compress_identical_objects()  # shared chrome forms and fonts from each page
+        writer.add_metadata({'/Title': meta['title'], '/Author': meta['author'], '/Subject': meta['subject']})
+        with span('pypdf.write'), open(path, 'wb') as f:
+            writer.write(f)
+    else:
+        pdf = _new_canvas(path, meta)
+        for page in V['pages']:
+            page(pdf, L)
+        with span('pdf.save'):
+            pdf.save()
+        PAGE_STATS['rendered'] += len(V['pages'])
+
+
+@profiled
+def build_pdf(lang_code, variant='energy', incremental=True, max_kb=None, dpi=None):
+    """Build one deck. With pypdf available, pages are cached under CACHE_DIR/pages
+    and only those whose inputs changed are rendered again.
+
+    dpi caps the effective resolution of every placed photo. max_kb is a file
+    size budget: if the first render is over it, fit_images() lowers DPI and
+    JPEG quality photo by photo, and the deck is rendered again, refitting on
+    the measured size until it fits or every photo is at the bottom of
+    SIZE_LADDER. A deck still over budget is reported with a warning (the
+    CLI then exits non-zero).
+    """
+    global _deck_dpi, _img_tuning, _placements
     L = LANG[lang_code]
+    V = VARIANTS[variant]
     suffix = 'ES' if lang_code == 'es' else 'EN'
-    path = os.path.join(OUT_DIR, f'Navitas-Energy-Pitch-{suffix}.pdf')
+    path = os.path.join(OUT_DIR, V['file'].format(suffix=suffix))
+    meta = {
+        'title': V['title'].format(suffix=suffix),
+        'author': 'Navitas Energy LTD',
+        'subject': u'Solar Development & EPC \u2014 Israel, Europe, LATAM',
+    }
+
+    _deck_dpi, _img_tuning, _placements = dpi, {}, {}
+    try:
+        _render_deck(path, L, V, lang_code, variant, meta, incremental)
+        placements = _placements
+    finally:
+        _placements = None
 
-    pdf = canvas.Canvas(path, pagesize=A4)
-    pdf.setTitle(f'Navitas Energy — Corporate Presentation 2026 ({suffix})')
-    pdf.setAuthor('Navitas Energy LTD')
-    pdf.setSubject(u'Solar Development & EPC — Israel, Europe, LATAM')
-
-    p1_cover(pdf, L)
-    p2_about(pdf, L)
-    p3_israel(pdf, L)
-    p4_europe(pdf, L)
-    p5_panama(pdf, L)
-    p6_argentina(pdf, L)
-    p7_team(pdf, L)
-    p8_strategy(pdf, L)
-
-    pdf.save()
     size = os.path.getsize(path)
-    print(f'  \u2705 {suffix}: {path} ({size / 1024:.0f} KB, 8 pages)')
+    budget = max_kb * 1024 if max_kb else None
+    if budget and size > budget and placements:
+        img_bytes = first = sum(cached_img(p, *_img_bounds(w, h, dw, dh, dpi))[1]
+                                for (p, w, h), (dw, dh) in placements.items())
+        while size > budget:  # non-photo bytes are estimated from the last render, so refit on what was measured
+            tuning, fitted = fit_images(placements, budget - (size - img_bytes), dpi)
+            if tuning == _img_tuning:
+                break  # every photo is as small as the ladder goes
+            _img_tuning, img_bytes = tuning, fitted
+            _render_deck(path, L, V, lang_code, variant, meta, incremental)
+            size = os.path.getsize(path)
+        print(f'  \U0001f3af {suffix}: photos {first / 1024:.0f} KB \u2192 {img_bytes / 1024:.0f} KB for a {max_kb} KB budget')
+
+    if budget and size > budget:
+        print(f'  \u26a0\ufe0f  {suffix}: {path} is {size / 1024:.0f} KB, over the {max_kb} KB budget even with every photo '
+              f'at the bottom of SIZE_LADDER')
+    else:
+        print(f'  \u2705 {suffix}: {path} ({size / 1024:.0f} KB, {len(V["pages"])} pages)')
     return path
 
 
+def _run_job(job):
+    """Build one (lang, variant, opts) job; runs inside a pool worker.
+
+    opts holds build_pdf keyword arguments plus 'profile', which turns on
+    span profiling for this job and returns its report.
+    """
+    lang_code, variant, opts = job
+    opts = dict(opts)
+    prof = enable_profiling() if opts.pop('profile', False) else None
+    before = dict(IMG_STATS, **{'pages_' + k: v for k, v in PAGE_STATS.items()})
+    t0 = time.perf_counter()
+    path = build_pdf(lang_code, variant, **opts)
+    elapsed = time.perf_counter() - t0
+    after = dict(IMG_STATS, **{'pages_' + k: v for k, v in PAGE_STATS.items()})
+    stats = {k: after[k] - before[k] for k in after}
+    return (lang_code, variant), path, elapsed, os.path.getsize(path), stats, prof and prof.report()
+
+
+def build_batch(jobs, workers=None, **opts):
+    """Render (lang, variant) jobs concurrently in a process pool.
+
+    opts are passed to every job (see build_pdf and _run_job). Workers share
+    the on-disk image and page caches; each image entry is prepared by one
+    worker under a lock file while the others wait and read it back, so a
+    cold run decodes every photo once. Returns one (job, path, seconds, bytes,
+    stats, profile) tuple per job, in input order.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    jobs = [(lang_code, variant, opts) for lang_code, variant in jobs]
+    t0 = time.perf_counter()
+    if workers == 1:
+        results = [_run_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_job, jobs))
+    wall = time.perf_counter() - t0
+
+    print(f'\n\u23f1\ufe0f  {len(jobs)} decks in {wall:.2f}s on {workers} worker(s)')
+    for (lang_code, variant), path, elapsed, size, stats, _ in results:
+        print(f'    {variant:<10} {lang_code:<3} {elapsed:6.2f}s  {size / 1024:7.0f} KB  '
+              f'pages {stats["pages_rendered"]} rendered / {stats["pages_reused"]} cached  '
+              f'img {stats["decoded"]} decoded / {stats["from_disk"]} disk / {stats["reused"]} mem')
+    return results
+
+
+def profile_report(results):
+    """Combine per-job profiles into one JSON-able report, with job names as the stack roots."""
+    jobs, stacks = [], defaultdict(float)
+    for (lang_code, variant), path, elapsed, size, stats, prof in results:
+        if not prof:
+            continue
+        name = f'{variant}:{lang_code}'
+        jobs.append({'job': name, 'wall_s': round(elapsed, 6), 'bytes': size, 'images': stats,
+                     'peak_traced_kb': prof['peak_traced_kb'], 'spans': prof['spans']})
+        for stack, sec in prof['stacks'].items():
+            stacks[f'{name};{stack}'] += sec
+    return {'jobs': jobs, 'stacks': dict(stacks)}
+
+
+def parse_job(spec):
+    """'en' or 'en:energy' -> ('en', 'energy')."""
+    lang_code, _, variant = spec.partition(':')
+    variant = variant or 'energy'
+    if lang_code not in LANG or variant not in VARIANTS:
+        raise argparse.ArgumentTypeError(f'unknown job {spec!r} (langs: {", ".join(LANG)}; variants: {", ".join(VARIANTS)})')
+    return lang_code, variant
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate Navitas Energy pitch decks.')
+    parser.add_argument('jobs', nargs='*', type=parse_job,
+                        help='lang[:variant] to build, e.g. es en:energy (default: every language of every variant)')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--full', action='store_true', help='render every page, ignoring the page cache')
+    parser.add_argument('--max-kb', type=int, default=None, help='file size budget per deck; photos are downsampled to fit')
+    parser.add_argument('--dpi', type=int, default=None, help='cap on the effective DPI of placed photos')
+    parser.add_argument('--profile', metavar='JSON', help='time cached_img, draw_img_card, pages and pdf.save into a JSON report')
+    parser.add_argument('--flame', metavar='TXT', help='with profiling, also write collapsed stacks for flame graphs')
+    args = parser.parse_args()
+    jobs = args.jobs or [(lang_code, variant) for variant in VARIANTS for lang_code in LANG]
+
     print('\n\U0001f4c4 Generating Navitas Energy pitch decks...\n')
-    es_path = build_pdf('es')
-    en_path = build_pdf('en')
-    print(f'\n\u2705 Done! Both versions ready.')
+    results = build_batch(jobs, args.workers, incremental=not args.full, max_kb=args.max_kb, dpi=args.dpi,
+                          profile=bool(args.profile or args.flame))
+    prune_img_cache()
+    totals = {k: sum(r[4][k] for r in results) for k in IMG_STATS}
+    print(f'\n\U0001f5bc\ufe0f  Images: {totals["decoded"]} decoded, {totals["from_disk"]} from disk cache, '
+          f'{totals["reused"]} reused in memory')
+    if args.profile or args.flame:
+        report = profile_report(results)
+        if args.profile:
+            with open(args.profile, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f'\U0001f4ca Profile: {args.profile}')
+        if args.flame:
+            write_flame(report['stacks'], args.flame)
+            print(f'\U0001f525 Flame stacks: {args.flame}')
+    over = [r for r in results if args.max_kb and r[3] > args.max_kb * 1024]
+    if over:
+        print(f'\n\u274c {len(over)} of {len(results)} decks over the {args.max_kb} KB budget: '
+              f'{", ".join(f"{v}:{lang_code} ({size / 1024:.0f} KB)" for (lang_code, v), _, _, size, _, _ in over)}')
+        raise SystemExit(1)
+    print(f'\n\u2705 Done! {len(results)} decks ready.')